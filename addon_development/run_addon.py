@@ -3,6 +3,7 @@ import addon_utils
 import importlib
 import sys
 from . utils import current_addon_exists, get_addon_name
+from .. autocompletion.suggestions.operator_catalogue import operator_catalogue
 
 class RunAddon(bpy.types.Operator):
     bl_idname = "code_autocomplete.run_addon"
@@ -23,4 +24,5 @@ class RunAddon(bpy.types.Operator):
             addon_utils.disable(addon_name)
             importlib.reload(module)
         addon_utils.enable(addon_name)
+        operator_catalogue.invalidate()
         return {"FINISHED"}
@@ -1,9 +1,16 @@
 import bpy
 import re
+import time
 from mathutils import Vector
 from . exception import BlockEvent
-from . suggestions import complete
-from .. settings import get_preferences
+from .. text_block import TextSnapshot
+from . suggestions.interface import Completion
+from . suggestions.ranking import RankedCompletions, mark_as_used
+from . completion_scheduler import CompletionScheduler
+from . suggestions import forget_closed_texts, update_project_words
+from . suggestions.operator_catalogue import operator_catalogue
+from . suggestions.fake_bpy_cache import fake_bpy_cache
+from .. settings import get_preferences, get_preferences_copy
 from .. graphics.text_box import TextBox
 from .. graphics.utils import getDpiFactor
 from .. graphics.list_box import ListItem, ListBox
@@ -19,6 +26,10 @@ move_index_commands = {
     "END" : 10000,
     "HOME" : -10000 }
 
+# completions only have to be recomputed when this changes
+def get_completion_context(text_block):
+    return text_block.name, text_block.current_line_index, text_block.text_before_current_word
+
 def is_event_changing_the_text(event):
     if len(event.unicode) > 0: return True
     if is_event_in_list(event, ["BACK_SPACE", "RET", "DEL"], "PRESS"): return True
@@ -27,7 +38,16 @@ def is_event_changing_the_text(event):
 class AutocompleteHandler:
     def __init__(self):
         self.context_ui = ContextUI()
-        self.completions = []
+        self.scheduler = CompletionScheduler()
+        self.completions = RankedCompletions([])
+        self.previous_completions = RankedCompletions([])
+        self.result_context = None
+        self.result_word = ""
+        self.requested_context = None
+        self.requested_word = ""
+        self.filtered_key = None
+        self.last_change_time = 0
+        self.debounce_time = 0
         self.draw_max = 8
         self.top_index = 0
         self.active_index = 0
@@ -43,12 +63,15 @@ class AutocompleteHandler:
 
         if is_event_changing_the_text(event):
             self.reload_completions = True
+            self.last_change_time = time.time()
 
         if self.completions_amount > 0:
             self.move_active_index(event)
 
     def update_settings(self):
-        self.draw_max = get_preferences().context_box.lines
+        settings = get_preferences().context_box
+        self.draw_max = settings.lines
+        self.debounce_time = settings.debounce_time / 1000
 
     def check_event_for_insertion(self, event, text_block):
         def insert_with_keyboard():
@@ -70,6 +93,7 @@ class AutocompleteHandler:
 
     def insert_completion(self, text_block, completion):
         completion.insert(text_block)
+        mark_as_used(completion.name)
         if completion.finished_statement: self.hide()
         self.active_index = 0
 
@@ -143,10 +167,73 @@ class AutocompleteHandler:
         self.active_index += amount
         self.correct_selection_indices()
 
+    def request_completions(self, text_block):
+        forget_closed_texts(set(bpy.data.texts.keys()))
+        settings = get_preferences_copy()
+        if settings.completion_providers.use_project_words:
+            update_project_words(text_block.name)
+        if settings.completion_providers.use_operator_completion:
+            operator_catalogue.update(text_block)
+        if settings.completion_providers.use_jedi_completion:
+            fake_bpy_cache.update()
+
+        snapshot = TextSnapshot(text_block)
+        self.requested_context = get_completion_context(snapshot)
+        self.requested_word = snapshot.current_word
+        self.scheduler.request(snapshot, settings)
+
+    # narrow the last result when only the current word grew
+    def refine_completions(self, text_block):
+        if self.scheduler.is_computing: return False
+        if not self.can_refine_result(text_block): return False
+        self.filtered_key = None
+        self.filter_previous_completions(text_block)
+        return True
+
+    def can_refine_result(self, text_block):
+        if get_completion_context(text_block) != self.result_context: return False
+        return text_block.current_word.startswith(self.result_word)
+
     def update_completions(self, text_block):
-        self.completions = complete(text_block)
+        completions = self.scheduler.pop_result()
+        if completions is None: return
+        self.completions = completions
+        self.previous_completions = completions
+        self.result_context = self.requested_context
+        self.result_word = self.requested_word
+        self.filtered_key = None
+        # late provider results can arrive after the word has been refined
+        if (get_completion_context(text_block), text_block.current_word) != (self.result_context, self.result_word):
+            self.filter_previous_completions(text_block)
         self.correct_selection_indices()
 
+    # show the old completions that still match while the new ones are not ready
+    def filter_previous_completions(self, text_block):
+        key = get_completion_context(text_block), text_block.current_word
+        if key == self.filtered_key: return
+        self.filtered_key = key
+        if self.can_refine_result(text_block):
+            self.completions = self.previous_completions.filter(text_block.current_word)
+        else:
+            self.completions = RankedCompletions([])
+        self.correct_selection_indices()
+
+    @property
+    def is_debouncing(self):
+        return time.time() - self.last_change_time < self.debounce_time
+
+    @property
+    def is_waiting_for_completions(self):
+        return self.reload_completions or self.scheduler.is_computing
+
+    # something will change without further input: a debounced request, a running computation,
+    # a result (possibly a late one) that has not been drawn yet or the description of the active item
+    @property
+    def needs_redraw(self):
+        if self.is_hidden: return False
+        if self.is_waiting_for_completions or self.scheduler.has_result: return True
+        return self.completions_amount > 0 and self.completions[self.active_index].description_pending
+
     def correct_selection_indices(self):
         index = self.active_index
         if index < 0:
@@ -162,13 +249,23 @@ class AutocompleteHandler:
         self.active_index = index
 
 
-    def draw(self, text_block):
+    # called on timer events, the text editor has applied the typed characters by then
+    def update_requests(self, text_block):
         if self.is_hidden: return
 
-        if self.reload_completions:
-            self.update_completions(text_block)
+        if self.reload_completions and self.refine_completions(text_block):
             self.reload_completions = False
+        if self.reload_completions and not self.is_debouncing:
+            self.request_completions(text_block)
+            self.reload_completions = False
+        if self.is_waiting_for_completions:
+            self.filter_previous_completions(text_block)
+
+    # only takes a finished result and renders, all requests are made in update_requests
+    def draw(self, text_block):
+        if self.is_hidden: return
 
+        self.update_completions(text_block)
         items = self.get_display_items()
         self.context_ui.update_settings()
         self.context_ui.insert_items(items)
@@ -176,15 +273,22 @@ class AutocompleteHandler:
 
     def get_display_items(self):
         items = []
-        for i, c in enumerate(self.completions):
-            if not self.top_index <= i < self.top_index + self.draw_max: continue
+        for i in range(self.top_index, min(self.top_index + self.draw_max, self.completions_amount)):
+            c = self.completions[i]
             item = ListItem(c.name)
             item.active = self.active_index == i
             item.data = c
             item.offset = 10 * getDpiFactor() if c.type.endswith("PARAMETER") else 0
             items.append(item)
+        if len(items) == 0 and self.is_waiting_for_completions:
+            item = ListItem("computing...")
+            item.data = Completion()
+            items.append(item)
         return items
 
+    def finish(self):
+        self.scheduler.stop()
+
     @property
     def completions_amount(self):
         return len(self.completions)
@@ -0,0 +1,79 @@
+import threading
+import traceback
+from . suggestions import complete
+from . suggestions.ranking import RankedCompletions
+
+# Computes the completions on a worker thread.
+# Only the newest request is kept, older ones that did not start yet are dropped
+# and results of requests that have been superseded in the meantime are ignored.
+# Partial results of the current request are available while it is still computing.
+# The providers must not access bpy from here: they only get the text snapshot,
+# the settings copy and data that the main thread prepared in request_completions.
+class CompletionScheduler:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.pending_request = None
+        self.result = None
+        self.request_id = 0
+        self.finished_id = 0
+        self.stopped = False
+        self.thread = None
+
+    def request(self, snapshot, settings):
+        with self.condition:
+            self.request_id += 1
+            self.pending_request = (self.request_id, snapshot, settings)
+            self.result = None
+            self.condition.notify()
+        self.ensure_worker()
+
+    def pop_result(self):
+        with self.condition:
+            result, self.result = self.result, None
+            return result
+
+    @property
+    def has_result(self):
+        return self.result is not None
+
+    @property
+    def is_computing(self):
+        return self.finished_id < self.request_id
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def ensure_worker(self):
+        if self.thread is not None and self.thread.is_alive(): return
+        self.stopped = False
+        self.thread = threading.Thread(target = self.run, daemon = True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending_request is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped: return
+                request_id, snapshot, settings = self.pending_request
+                self.pending_request = None
+
+            completions = self.compute(request_id, snapshot, settings)
+
+            with self.condition:
+                self.finished_id = request_id
+                if request_id == self.request_id:
+                    self.result = completions
+
+    def compute(self, request_id, snapshot, settings):
+        def publish_partial_result(completions):
+            with self.condition:
+                if request_id == self.request_id:
+                    self.result = completions
+
+        try: return complete(snapshot, settings, publish_partial_result)
+        except:
+            if settings.debug: traceback.print_exc()
+            return RankedCompletions([])
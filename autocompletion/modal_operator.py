@@ -6,7 +6,10 @@ from .. settings import get_preferences
 from . active_text_area import ActiveTextArea
 from . autocomplete_handler import AutocompleteHandler
 from . suggestions.jedi_completion import jedi_module_found
-from . suggestions.generate_fake_bpy import fake_bpy_module_exists
+from . suggestions import jedi_provider
+from . suggestions.provider_runner import provider_statistics
+from . suggestions.fake_bpy_cache import fake_bpy_cache
+from . suggestions.generate_fake_bpy import fake_bpy_module_exists, fake_bpy_module_is_seeded
 
 is_running = False
 active_text_area = ActiveTextArea()
@@ -28,16 +31,30 @@ class Autocomplete(bpy.types.Panel):
             row.operator("code_autocomplete.stop_modal_operator", text = "Stop")
 
         if fake_bpy_module_exists():
-            row.operator("code_autocomplete.regenerate_fake_bpy", text = "", icon = "RECOVER_AUTO")
+            row.operator("code_autocomplete.regenerate_fake_bpy", text = "", icon = "RECOVER_AUTO").force = True
+            if fake_bpy_module_is_seeded():
+                layout.operator("code_autocomplete.regenerate_fake_bpy", "Update BPY Module", icon = "ERROR")
         else:
             layout.operator("code_autocomplete.regenerate_fake_bpy", "Build BPY Module", icon = "ERROR")
 
         if jedi_module_found():
             providers = get_preferences().completion_providers
             layout.prop(providers, "use_jedi_completion")
+            if jedi_provider.warm_up_state == "RUNNING":
+                layout.label("Preparing Jedi ({}%)".format(int(jedi_provider.warm_up_progress * 100)), icon = "TIME")
+            elif jedi_provider.warm_up_state == "READY":
+                layout.label("Jedi is ready", icon = "FILE_TICK")
+            elif jedi_provider.warm_up_state == "FAILED":
+                layout.label("Jedi preparation failed", icon = "ERROR")
         else:
             layout.label("Jedi library not found", icon = "ERROR")
 
+        if get_preferences().debug:
+            col = layout.column(align = True)
+            for name, statistics in sorted(provider_statistics.items()):
+                col.label("{}: {:.1f} ms, {} of {} over budget".format(
+                    name, statistics.average_time * 1000, statistics.budget_hits, statistics.calls))
+
 
 class StartModalOperator(bpy.types.Operator):
     bl_idname = "code_autocomplete.start_modal_operator"
@@ -46,6 +63,10 @@ class StartModalOperator(bpy.types.Operator):
     bl_options = {"REGISTER"}
 
     def execute(self, context):
+        providers = get_preferences().completion_providers
+        if providers.use_jedi_completion:
+            fake_bpy_cache.update()
+            jedi_provider.warm_up(providers.use_jedi_server)
         bpy.ops.code_autocomplete.modal_text_operator("INVOKE_DEFAULT")
         active_text_area.set_area(context.area)
         global is_running
@@ -74,19 +95,32 @@ class ModalTextOperator(bpy.types.Operator):
     def invoke(self, context, event):
         args = (self, context)
         self._handle = bpy.types.SpaceTextEditor.draw_handler_add(self.draw_callback_px, args, "WINDOW", "POST_PIXEL")
+        # the timer schedules the debounced requests and makes sure that finished background completions get drawn
+        self._timer = context.window_manager.event_timer_add(0.05, context.window)
         context.window_manager.modal_handler_add(self)
         self.handlers = [AutocompleteHandler()]
         return {"RUNNING_MODAL"}
 
     def modal(self, context, event):
-        self.redraw_text_editors()
+        # timer events only cause a redraw while completions are pending
+        if event.type != "TIMER" or any(handler.needs_redraw for handler in self.handlers):
+            self.redraw_text_editors()
         active_text_area.update(event)
 
         if not is_running or event.type == "F8":
             return self.finish()
 
+        if event.type == "TIMER":
+            self.update_requests()
         return self.update_handlers(event)
 
+    # requests are not made while drawing, so that drawing never waits for their preparation
+    def update_requests(self):
+        text_block = self.get_text_block()
+        if not text_block: return
+        for handler in self.handlers:
+            handler.update_requests(text_block)
+
     def redraw_text_editors(self):
         for area in bpy.context.screen.areas:
             if area.type == "TEXT_EDITOR":
@@ -107,6 +141,10 @@ class ModalTextOperator(bpy.types.Operator):
 
     def finish(self):
         bpy.types.SpaceTextEditor.draw_handler_remove(self._handle, "WINDOW")
+        bpy.context.window_manager.event_timer_remove(self._timer)
+        for handler in self.handlers:
+            handler.finish()
+        jedi_provider.stop_server()
         if get_preferences().debug: print("Finished modal text operator")
         return {"FINISHED"}
 
@@ -2,6 +2,10 @@ from . jedi_completion import JediCompletionProvider
 from . word_completion import WordCompletionProvider
 from . operator_completion import OperatorCompletionProvider
 from . static_pattern_completion import StaticPatternProvider
+from . ranking import RankedCompletions
+from . project_words import project_words
+from . word_index import remove_closed_word_indices
+from . provider_runner import ProviderRun, provider_statistics, run_providers_concurrently
 from ... settings import get_preferences
 
 jedi_provider = JediCompletionProvider()
@@ -9,19 +13,59 @@ word_provider = WordCompletionProvider()
 operator_provider = OperatorCompletionProvider()
 static_pattern_provider = StaticPatternProvider()
 
-def complete(text_block):
-    setting = get_preferences().completion_providers
+# name, provider, setting that enables it
+providers = [
+    ("static_pattern", static_pattern_provider, None),
+    ("operator", operator_provider, "use_operator_completion"),
+    ("jedi", jedi_provider, "use_jedi_completion"),
+    ("word", word_provider, "use_word_completion") ]
 
-    completions = []
-    completions.extend(static_pattern_provider.complete(text_block))
-    if setting.use_operator_completion: completions.extend(operator_provider.complete(text_block))
-    if setting.use_jedi_completion: completions.extend(jedi_provider.complete(text_block))
-    if setting.use_word_completion: completions.extend(word_provider.complete(text_block))
+# on_update gets called with the merged completions whenever a provider finished.
+# Runs on a worker thread, everything that needs bpy is prepared by the main thread
+# (operator catalogue, project words, fake bpy build).
+def complete(text_block, settings = None, on_update = None):
+    if settings is None: settings = get_preferences()
+    setting = settings.completion_providers
+    jedi_provider.use_server = setting.use_jedi_server
+    word_provider.use_project_words = setting.use_project_words
+    runs = get_provider_runs(text_block, setting)
+    hits = {run.name : provider_statistics[run.name].budget_hits for run in runs}
+    word = text_block.current_word
 
-    list1, list2, list3 = [], [], []
-    for c in completions:
-        if c.type == "OPERATOR_PARAMETER": list1.append(c)
-        elif c.type == "PARAMETER": list2.append(c)
-        else: list3.append(c)
+    completions = RankedCompletions([], word)
+    def update(results):
+        nonlocal completions
+        completions = RankedCompletions.from_results(results, word)
+        if on_update is not None: on_update(completions)
 
-    return list1 + list2 + list3
+    if setting.run_concurrently:
+        run_providers_concurrently(runs, update)
+    else:
+        results = []
+        for run in runs:
+            run.start()
+            results.append((run.name, run.wait_and_finish()))
+        update(results)
+
+    if settings.debug:
+        for run in runs:
+            if provider_statistics[run.name].budget_hits > hits[run.name]:
+                print("Completion provider '{}' exceeded its time budget".format(run.name))
+    return completions
+
+def get_provider_runs(text_block, setting):
+    runs = []
+    for name, provider, use_setting in providers:
+        if use_setting is not None and not getattr(setting, use_setting): continue
+        budget = getattr(setting, name + "_budget") / 1000
+        runs.append(ProviderRun(name, provider, text_block, budget))
+    return runs
+
+# called with the names of all texts that are still open
+def forget_closed_texts(existing_names):
+    jedi_provider.remove_closed_sessions(existing_names)
+    remove_closed_word_indices(existing_names)
+
+# has to be called from the main thread before requesting completions
+def update_project_words(current_name):
+    project_words.update_texts(current_name)
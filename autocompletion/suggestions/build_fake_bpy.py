@@ -0,0 +1,41 @@
+'''
+Builds the fake bpy package from an RNA schema snapshot, without Blender.
+Snapshots are exported in Blender with the Export RNA Schema operator.
+
+Usage: python build_fake_bpy.py snapshot output_directory
+
+The package is written to output_directory/_bpy_fake. Like in Blender
+only files whose content changed are written, so two builds can be
+compared with a normal diff.
+'''
+
+import os
+import sys
+import types
+import importlib
+
+# import the bpy independent modules without running the __init__ of this package
+def import_modules():
+    package_name = "code_autocomplete_build_fake_bpy"
+    package = types.ModuleType(package_name)
+    package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+    sys.modules[package_name] = package
+    return (importlib.import_module(package_name + ".rna_schema_snapshot"),
+            importlib.import_module(package_name + ".fake_bpy_rendering"),
+            importlib.import_module(package_name + ".jedi_source"))
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    snapshot_path, output_directory = sys.argv[1:]
+    rna_schema_snapshot, fake_bpy_rendering, jedi_source = import_modules()
+
+    snapshot = rna_schema_snapshot.load_snapshot(snapshot_path)
+    print("Snapshot of Blender {}".format(".".join(str(number) for number in snapshot["blender_version"])))
+    directory = os.path.join(output_directory, jedi_source.fake_package_name)
+    timings = fake_bpy_rendering.build_fake_bpy(directory, snapshot["schema"])
+    print("Fake bpy: " + ", ".join("{} {:.3f}s".format(*timing) for timing in timings))
+
+if __name__ == "__main__":
+    main()
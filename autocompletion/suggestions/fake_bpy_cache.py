@@ -0,0 +1,105 @@
+import os
+import sys
+import bpy
+import json
+import time
+import shutil
+import hashlib
+from . jedi_source import fake_package_name
+from . provider_runner import get_executor
+
+builds_directory = os.path.join(os.path.dirname(__file__), "dynamic", "builds")
+index_path = os.path.join(builds_directory, "index.json")
+max_cached_builds = 4
+
+# Generated fake bpy packages are stored per Blender version and set of
+# enabled addons, so switching between them does not require a rebuild.
+# Only the directory of the active build is in sys.path.
+# A new build starts as a copy of the most recently used one, so completion
+# keeps working and regenerating it only rewrites the files that changed.
+# Such a copy is marked as seeded until it has been regenerated.
+class FakeBPYCache:
+    def __init__(self):
+        self.active_key = None
+
+    @property
+    def active_directory(self):
+        if self.active_key is None: return None
+        return get_build_directory(self.active_key)
+
+    @property
+    def package_directory(self):
+        return os.path.join(self.active_directory, fake_package_name)
+
+    # must be called from the main thread, but not while drawing because it can copy and delete builds
+    def update(self):
+        key = get_build_key()
+        if key == self.active_key: return
+        old_directory = self.active_directory
+        index = load_index()
+        if not build_exists(key): seed_build(key, index)
+        self.active_key = key
+        # in-process jedi imports the fake package on its worker, so sys.path is changed there
+        get_executor("jedi").submit(replace_sys_path, old_directory, self.active_directory)
+        self.mark_as_used(key, index)
+
+    def build_exists(self):
+        return self.active_key is not None and build_exists(self.active_key)
+
+    def mark_as_generated(self):
+        try: os.remove(get_seed_marker_path(self.active_key))
+        except OSError: pass
+
+    def mark_as_used(self, key, index):
+        index[key] = time.time()
+        for old_key in sorted(index.keys(), key = index.get)[:-max_cached_builds]:
+            shutil.rmtree(get_build_directory(old_key), ignore_errors = True)
+            del index[old_key]
+        save_index(index)
+
+def replace_sys_path(old_directory, new_directory):
+    if old_directory in sys.path:
+        sys.path.remove(old_directory)
+    sys.path.append(new_directory)
+
+def get_build_key():
+    version = "_".join(str(number) for number in bpy.app.version)
+    addons = sorted(bpy.context.user_preferences.addons.keys())
+    addons_hash = hashlib.sha1("\n".join(addons).encode("utf-8")).hexdigest()[:12]
+    return version + "-" + addons_hash
+
+def get_build_directory(key):
+    return os.path.join(builds_directory, key)
+
+def build_exists(key):
+    return os.path.exists(os.path.join(get_build_directory(key), fake_package_name, "__private__"))
+
+def seed_build(key, index):
+    for old_key in sorted(index.keys(), key = index.get, reverse = True):
+        if not build_exists(old_key): continue
+        shutil.rmtree(get_build_directory(key), ignore_errors = True)
+        try:
+            shutil.copytree(get_build_directory(old_key), get_build_directory(key))
+            open(get_seed_marker_path(key), "w").close()
+        except OSError as e: print("Could not copy the fake bpy build {}: {}".format(old_key, e))
+        return
+
+def is_seeded_build(key):
+    return os.path.exists(get_seed_marker_path(key))
+
+def get_seed_marker_path(key):
+    return os.path.join(get_build_directory(key), "seeded")
+
+def load_index():
+    try:
+        with open(index_path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def save_index(index):
+    os.makedirs(builds_directory, exist_ok = True)
+    with open(index_path, "w") as file:
+        json.dump(index, file, indent = 1, sort_keys = True)
+
+fake_bpy_cache = FakeBPYCache()
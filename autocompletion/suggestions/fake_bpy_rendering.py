@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import hashlib
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+
+# This module must not depend on bpy.
+# It renders the fake bpy package from the schema that generate_fake_bpy extracts:
+#     {"types" : {name : {"properties" : [property, ...],
+#                         "functions" : [{"identifier", "description", "parameters" : [property, ...]}, ...]}},
+#      "collection_types" : {collection srna : item type}}
+# A property is a dict with: identifier, type, description, array_length,
+# fixed_type, srna, enum_items, is_output and readable_type.
+
+docstring_width = 70
+use_quote_marks = False
+batch_size = 100
+max_workers = 4
+
+# renders and writes the package, returns the time of each phase
+# Rendering only builds strings while holding the GIL, so it runs serially,
+# only the file writes are spread over a thread pool.
+def build_fake_bpy(directory, schema):
+    timings = []
+    start = time.perf_counter()
+    files = render_files(schema)
+    timings.append(("render", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        written, removed = update_fake_bpy_files(directory, files, executor)
+    timings.append(("write", time.perf_counter() - start))
+
+    print("Fake bpy: {} files written, {} unchanged, {} removed".format(
+        written, len(files) - written, removed))
+    return timings
+
+# relative path -> file content
+def render_files(schema):
+    files = {}
+    files["__init__.py"] = init_content
+    files["__private__/__init__.py"] = ""
+    files[get_code_file_name("bpy_struct")] = bpy_struct_content
+
+    collection_types = schema["collection_types"]
+    for name in sorted(schema["types"].keys()):
+        files[get_code_file_name(name)] = get_code(name, schema["types"][name], collection_types)
+    return files
+
+def get_code_file_name(name):
+    return "__private__/" + name.lower() + ".py"
+
+init_content = '''
+from . __private__.context import Context as context
+from . __private__.blenddata import BlendData as data
+'''
+
+def get_code(name, type, collection_types):
+    dependencies = get_dependencies(name, type, collection_types)
+
+    lines = []
+    lines.extend(get_import_code_lines(sorted(dependencies)))
+    lines.append("class {}({}):".format(name, "" if name == "Context" else "bpy_struct"))
+    lines.extend(get_property_code_lines(type))
+    lines.extend(get_function_code_lines(name, type, collection_types))
+    return "\n".join(lines)
+
+def get_import_code_lines(dependencies):
+    return ["from . {} import {}".format(d.lower(), d) for d in dependencies] + ["from . bpy_struct import bpy_struct", "import mathutils", ""]
+
+def get_property_code_lines(type):
+    lines = []
+    for property in type["properties"]:
+        lines.extend(get_property_definition_code_lines(property))
+    return lines
+
+def get_property_definition_code_lines(property):
+    lines = []
+    lines.append("    @property")
+    lines.append("    def {}(self):".format(property["identifier"]))
+    lines.extend(get_property_docstring_lines(property, docstring_width))
+    lines.append("        return {}".format(get_property_declaration(property)))
+    return lines
+
+def get_function_code_lines(name, type, collection_types):
+    lines = []
+    for function in type["functions"]:
+        lines.append("    def {}({}):".format(function["identifier"], get_function_parameter_list(function)))
+        lines.extend(get_function_docstring_lines(function, docstring_width))
+        lines.append("        return {}".format(get_function_return_list(function)))
+
+    if name in collection_types:
+        subtype = collection_types[name]
+        lines.append("    def get(key): return {}()".format(subtype))
+        lines.append("    def __getitem__(key): return {}()".format(subtype))
+        lines.append("    def __iter__(key): yield {}()".format(subtype))
+
+    return lines
+
+def get_property_docstring_lines(property, width = 70, indent = 8):
+    lines = get_property_description_lines(property, width)
+    lines.extend(get_enum_item_lines(property, width))
+    return make_docstring_from_lines(lines, indent)
+
+def get_function_docstring_lines(function, width = 70, indent = 8):
+    lines = get_function_description_lines(function, width)
+    parameter_lines = get_parameter_lines(function, width)
+    lines.extend(parameter_lines)
+    return make_docstring_from_lines(lines, indent)
+
+def get_parameter_lines(function, width):
+    lines = []
+    params = [p for p in function["parameters"] if not p["is_output"]]
+    if len(params) > 0:
+        lines.append("")
+        lines.append("Parameter:")
+        lines.extend(get_parameter_list_lines(params, width))
+    returns = [p for p in function["parameters"] if p["is_output"]]
+    if len(returns) > 0:
+        lines.append("")
+        lines.append("Returns:")
+        lines.extend(get_parameter_list_lines(returns, width))
+    return lines
+
+def get_parameter_list_lines(params, width):
+    lines = []
+    for param in params:
+        lines.append("{}:".format(param["identifier"]))
+        description_lines = get_property_description_lines(param, width)
+        amount = len(description_lines)
+        if amount == 0: lines[-1] += " <no description available>"
+        elif amount == 1: lines[-1] += " " + description_lines[0]
+        else:
+            indent_lines(description_lines, 2)
+            lines.extend(description_lines)
+    indent_lines(lines, 2)
+    return lines
+
+def get_property_description_lines(property, width):
+    type = "({})".format(property["readable_type"])
+    if property["description"] in (None, ""): return [type]
+    return textwrap.wrap(type + " " + property["description"], width)
+
+def get_function_description_lines(function, width):
+    if function["description"] in (None, ""): return []
+    return textwrap.wrap(function["description"], width)
+
+def get_enum_item_lines(property, width):
+    items = property["enum_items"]
+    if items is None or len(items) == 0: return []
+    quote_mark = "'" if use_quote_marks else ""
+    item_string = "["+ ", ".join(quote_mark + item + quote_mark for item in items) +"]"
+    return [""] + textwrap.wrap(item_string, width)
+
+def make_docstring_from_lines(lines, indent = 8):
+    if len(lines) == 0: return []
+    lines[0] = "'''" + lines[0]
+    lines[-1] += "'''"
+    indent_lines(lines, indent)
+    return lines
+
+def indent_lines(lines, indent = 4):
+    spaces = " " * indent
+    for i in range(len(lines)):
+        lines[i] = spaces + lines[i]
+
+def get_dependencies(name, type, collection_types):
+    def find_property_dependency(property):
+        if property["type"] == "POINTER":
+            dependencies.add(property["fixed_type"])
+        if property["type"] == "COLLECTION":
+            if property["srna"] is None: dependencies.add(property["fixed_type"])
+            else: dependencies.add(property["srna"])
+
+    dependencies = set()
+    if name in collection_types:
+        dependencies.add(collection_types[name])
+    for property in type["properties"]:
+        find_property_dependency(property)
+    for function in type["functions"]:
+        for parameter in function["parameters"]:
+            find_property_dependency(parameter)
+    return dependencies
+
+def get_function_parameter_list(function):
+    parameters = ["self"] + [parameter["identifier"] for parameter in function["parameters"] if not parameter["is_output"]]
+    return ", ".join(parameters)
+
+def get_function_return_list(function):
+    returns = [parameter for parameter in function["parameters"] if parameter["is_output"]]
+    return ", ".join([get_property_declaration(parameter) for parameter in returns])
+
+def get_property_declaration(property):
+    if property["type"] == "BOOLEAN": return "bool()"
+    if property["type"] == "INT": return "int()"
+    if property["type"] in ("STRING", "ENUM"): return "str()"
+    if property["type"] == "COLLECTION":
+        if property["srna"] is None: return "({}(),)".format(property["fixed_type"])
+        else: return property["srna"] + "()"
+    if property["type"] == "FLOAT":
+        if property["array_length"] <= 1: return "float()"
+        if property["array_length"] in (2, 3): return "mathutils.Vector()"
+        if property["array_length"] == 16: return "mathutils.Matrix()"
+    if property["type"] == "POINTER":
+        return property["fixed_type"] + "()"
+    return "''"
+
+
+# The manifest stores a hash of every generated file. Only files whose
+# content changed are written, so unchanged files (and their jedi cache) stay valid.
+def update_fake_bpy_files(directory, files, executor):
+    old_manifest = load_manifest(directory)
+    new_manifest = {name : get_content_hash(code) for name, code in files.items()}
+    changed = [name for name, content_hash in new_manifest.items()
+               if old_manifest.get(name) != content_hash or not os.path.exists(get_file_path(directory, name))]
+
+    for name in changed:
+        os.makedirs(os.path.dirname(get_file_path(directory, name)), exist_ok = True)
+    batches = [changed[i:i + batch_size] for i in range(0, len(changed), batch_size)]
+    list(executor.map(lambda batch: write_batch(directory, files, batch), batches))
+
+    removed = remove_orphans(directory, set(files.keys()))
+    save_manifest(directory, new_manifest)
+    return len(changed), removed
+
+def write_batch(directory, files, names):
+    for name in names:
+        with open(get_file_path(directory, name), "w") as file:
+            file.write(files[name])
+
+def remove_orphans(directory, names):
+    removed = 0
+    for root, directory_names, file_names in os.walk(directory):
+        for file_name in file_names:
+            if not file_name.endswith(".py"): continue
+            path = os.path.join(root, file_name)
+            name = os.path.relpath(path, directory).replace(os.sep, "/")
+            if name not in names:
+                os.remove(path)
+                removed += 1
+    return removed
+
+def get_content_hash(code):
+    return hashlib.sha1(code.encode("utf-8")).hexdigest()
+
+def get_file_path(directory, name):
+    return os.path.join(directory, *name.split("/"))
+
+def get_manifest_path(directory):
+    return os.path.join(directory, "manifest.json")
+
+def load_manifest(directory):
+    try:
+        with open(get_manifest_path(directory)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(directory, manifest):
+    os.makedirs(directory, exist_ok = True)
+    with open(get_manifest_path(directory), "w") as file:
+        json.dump(manifest, file, indent = 1, sort_keys = True)
+
+
+bpy_struct_content = '''
+from . fcurve import FCurve
+
+class bpy_struct:
+    id_data = ID()
+    def as_pointer():
+        return int()
+    def driver_add(path, index):
+        return FCurve()
+    def driver_remove(path, index):
+        return bool()
+    def keyframe_delete(data_path, index, frame, group):
+        return bool()
+    def keyframe_insert(data_path, index, frame, group):
+        return bool()
+    def path_from_id(property):
+        return str()
+    def path_resolve(path, coerce):
+        return
+    def property_unsert(property):
+        return
+'''
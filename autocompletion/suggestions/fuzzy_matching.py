@@ -0,0 +1,90 @@
+# This module must not depend on bpy.
+
+character_bits = {char : 1 << i for i, char in enumerate("abcdefghijklmnopqrstuvwxyz0123456789_.")}
+other_character_bit = 1 << len(character_bits)
+
+# one bit per character that appears in the text (case insensitive),
+# a candidate can only match when it has all bits of the query
+def get_character_mask(text):
+    mask = 0
+    for char in text.lower():
+        mask |= character_bits.get(char, other_character_bit)
+    return mask
+
+max_cached_masks = 50000
+mask_cache = {}
+
+def get_cached_character_mask(text):
+    mask = mask_cache.get(text)
+    if mask is None:
+        if len(mask_cache) > max_cached_masks: mask_cache.clear()
+        mask = get_character_mask(text)
+        mask_cache[text] = mask
+    return mask
+
+# Case insensitive subsequence matching that prefers characters at the
+# start of words (after '_' or '.', or camelCase humps): 'sceob' -> 'scene.objects'
+class FuzzyMatcher:
+    def __init__(self, query):
+        self.query = query
+        self.lower_query = query.lower()
+        self.mask = get_character_mask(query)
+
+    def matches(self, candidate, mask = None):
+        return self.score(candidate, mask) is not None
+
+    # higher is better, None when the query is not a subsequence of the candidate
+    def score(self, candidate, mask = None):
+        if self.lower_query == "": return 0
+        if mask is None: mask = get_cached_character_mask(candidate)
+        if self.mask & ~mask: return None
+
+        lower_candidate = candidate.lower()
+        if lower_candidate.startswith(self.lower_query):
+            return 2000 + (100 if candidate.startswith(self.query) else 0) - len(candidate)
+        index = lower_candidate.find(self.lower_query)
+        if index != -1:
+            return 1000 + (50 if is_word_start(candidate, index) else 0) - index
+        return self.subsequence_score(candidate, lower_candidate)
+
+    def subsequence_score(self, candidate, lower_candidate):
+        score = 0
+        previous = -1
+        for i, char in enumerate(self.query):
+            position = find_position(candidate, lower_candidate, self.lower_query[i:], previous)
+            if position == -1: return None
+            if is_word_start(candidate, position): score += 10
+            if position == previous + 1: score += 5
+            if candidate[position] == char: score += 1
+            score -= position - previous - 1
+            previous = position
+        return score
+
+def find_position(candidate, lower_candidate, rest_query, previous):
+    char = rest_query[0]
+    position = lower_candidate.find(char, previous + 1)
+    if position == -1 or position == previous + 1 or is_word_start(candidate, position):
+        return position
+
+    # jump to the next word start when the rest of the query still fits after it
+    boundary = position + 1
+    while True:
+        boundary = lower_candidate.find(char, boundary)
+        if boundary == -1: return position
+        if is_word_start(candidate, boundary): break
+        boundary += 1
+    if is_subsequence(rest_query[1:], lower_candidate, boundary + 1): return boundary
+    return position
+
+def is_subsequence(query, text, start = 0):
+    for char in query:
+        start = text.find(char, start)
+        if start == -1: return False
+        start += 1
+    return True
+
+def is_word_start(text, index):
+    if index == 0: return True
+    before, char = text[index - 1], text[index]
+    if not before.isalnum(): return True
+    return char.isupper() and before.islower()
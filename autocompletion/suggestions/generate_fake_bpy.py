@@ -1,21 +1,11 @@
 import bpy
-import os
-import sys
-import shutil
+from bpy.props import *
+import time
 import inspect
-import textwrap
-from ... settings import get_preferences
+from . fake_bpy_cache import fake_bpy_cache, build_exists, is_seeded_build, get_build_key
 from . rna_utils import get_readable_property_type
-
-fake_package_name = "_bpy_fake"
-top_directory = os.path.join(os.path.dirname(__file__), "dynamic")
-directory = os.path.join(top_directory, fake_package_name)
-private_path = os.path.join(directory, "__private__")
-
-sys.path.append(top_directory)
-
-docstring_width = 70
-use_quote_marks = False
+from . rna_schema_snapshot import save_snapshot
+from . fake_bpy_rendering import build_fake_bpy, get_dependencies
 
 
 class GenerateFakeBPY(bpy.types.Operator):
@@ -24,259 +14,121 @@ class GenerateFakeBPY(bpy.types.Operator):
     bl_description = "Regenerate the fake bpy module that the jedi autocompletion needs"
     bl_options = {"REGISTER"}
 
+    force = BoolProperty(name = "Force", default = False,
+        description = "Regenerate even when a build for this Blender version and these addons exists")
+
     def execute(self, context):
+        fake_bpy_cache.update()
+        if fake_bpy_cache.build_exists() and not is_seeded_build(fake_bpy_cache.active_key) and not self.force:
+            self.report({"INFO"}, "Reusing the existing bpy module")
+            return {"FINISHED"}
         regenerate_fake_bpy()
         return {"FINISHED"}
 
-def fake_bpy_module_exists():
-    return os.path.exists(private_path)
+class ExportRNASchema(bpy.types.Operator):
+    bl_idname = "code_autocomplete.export_rna_schema"
+    bl_label = "Export RNA Schema"
+    bl_description = "Save the RNA schema that the fake bpy module is built from (.json or .msgpack)"
+    bl_options = {"REGISTER"}
 
-def regenerate_fake_bpy():
-    remove_old_fake()
-    generate_fake_bpy()
+    filepath = StringProperty(subtype = "FILE_PATH")
+    all_types = BoolProperty(name = "All Types", default = False,
+        description = "Export all types instead of only the ones reachable from the context")
 
-def remove_old_fake():
-    if os.path.exists(directory):
-        shutil.rmtree(directory, ignore_errors = True)
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
 
-def generate_fake_bpy():
-    try: os.makedirs(directory)
-    except: pass
-    create_init()
-    create_private_subdirectory()
+    def execute(self, context):
+        output_path = self.filepath
+        if not output_path.lower().endswith((".json", ".msgpack")):
+            output_path += ".json"
+        try: save_snapshot(output_path, extract_schema(self.all_types), bpy.app.version)
+        except ImportError as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
+        return {"FINISHED"}
 
-def create_init():
-    path = os.path.join(directory, "__init__.py")
-    file = open(path, "w+")
-    file.write(init_content)
-    file.close()
+# called while drawing, so they must not change the cache
+def fake_bpy_module_exists():
+    return build_exists(get_build_key())
 
-init_content = '''
-from . __private__.context import Context as context
-from . __private__.blenddata import BlendData as data
-'''
+# the build is a copy of the one for other addons
+def fake_bpy_module_is_seeded():
+    return is_seeded_build(get_build_key())
 
-def create_private_subdirectory():
-    os.makedirs(private_path)
-    open(os.path.join(private_path, "__init__.py"), "a").close()
-    write_code_file("__init__", "")
-    write_code_file("bpy_struct", bpy_struct_content)
-    generate_code_files()
+def regenerate_fake_bpy():
+    start = time.perf_counter()
+    schema = extract_schema()
+    extract_time = time.perf_counter() - start
 
+    timings = build_fake_bpy(fake_bpy_cache.package_directory, schema)
+    fake_bpy_cache.mark_as_generated()
+    timings.insert(0, ("extract", extract_time))
+    print("Fake bpy: " + ", ".join("{} {:.3f}s".format(*timing) for timing in timings))
 
-collection_types = {}
-def generate_code_files(create_all = False):
+
+# Extraction needs bpy and runs on the main thread, it only creates the
+# plain schema that fake_bpy_rendering turns into code.
+def extract_schema(create_all = False):
+    types = {}
+    collection_types = {}
     types_to_generate = {"Context", "Panel"}
-    generated_types = set()
 
     while len(types_to_generate) > 0:
         name = types_to_generate.pop()
-        generated_types.add(name)
-        type = getattr(bpy.types, name)
-        code, dependencies = get_code_and_dependencies(name, type)
-        write_code_file(name, code)
-        types_to_generate.update([d for d in dependencies if d not in generated_types])
+        type = extract_type(getattr(bpy.types, name), get_type_properties(name))
+        types[name] = type
+        collection_types.update(get_collection_types(type))
+        dependencies = get_dependencies(name, type, collection_types)
+        types_to_generate.update([d for d in dependencies if d not in types])
 
         if len(types_to_generate) == 0 and create_all:
             bpy_types = [(name, type) for name, type in inspect.getmembers(bpy.types) if "." not in name]
             for name, type in bpy_types:
-                if name not in generated_types:
+                if name not in types:
                     types_to_generate.add(name)
 
+    return {"types" : types, "collection_types" : collection_types}
+
+def get_type_properties(name):
+    properties = list(getattr(bpy.types, name).bl_rna.properties)
+    if name == "Context": properties.extend(fake_context_properties)
+    return properties
+
+def extract_type(type, properties):
+    return {
+        "properties" : [extract_property(property) for property in properties],
+        "functions" : [extract_function(function) for function in type.bl_rna.functions] }
+
+def extract_function(function):
+    return {
+        "identifier" : function.identifier,
+        "description" : function.description,
+        "parameters" : [extract_property(parameter) for parameter in function.parameters] }
+
+def extract_property(property):
+    fixed_type = getattr(property, "fixed_type", None)
+    srna = getattr(property, "srna", None)
+    enum_items = getattr(property, "enum_items", None)
+    return {
+        "identifier" : property.identifier,
+        "type" : property.type,
+        "description" : getattr(property, "description", None),
+        "array_length" : getattr(property, "array_length", 0),
+        "fixed_type" : None if fixed_type is None else fixed_type.identifier,
+        "srna" : None if srna is None else srna.identifier,
+        "enum_items" : None if enum_items is None else [item.identifier for item in enum_items],
+        "is_output" : bool(getattr(property, "is_output", False)),
+        "readable_type" : get_readable_property_type(property) }
+
+def get_collection_types(type):
+    properties = list(type["properties"])
+    for function in type["functions"]:
+        properties.extend(function["parameters"])
+    return {property["srna"] : property["fixed_type"] for property in properties
+            if property["type"] == "COLLECTION" and property["srna"] is not None}
 
-def get_code_and_dependencies(name, type):
-    dependencies = get_dependencies(name, type)
-
-    lines = []
-    lines.extend(get_import_code_lines(dependencies))
-    lines.append("class {}({}):".format(name, "" if name == "Context" else "bpy_struct"))
-    lines.extend(get_property_code_lines(type))
-    lines.extend(get_function_code_lines(name, type))
-
-    return "\n".join(lines), dependencies
-
-def get_import_code_lines(dependencies):
-    return ["from . {} import {}".format(d.lower(), d) for d in dependencies] + ["from . bpy_struct import bpy_struct", "import mathutils", ""]
-
-def get_property_code_lines(type):
-    lines = []
-    for property in get_type_properties(type):
-        lines.extend(get_property_definition_code_lines(property))
-    return lines
-
-def get_property_definition_code_lines(property):
-    lines = []
-    lines.append("    @property")
-    lines.append("    def {}(self):".format(property.identifier))
-    lines.extend(get_property_docstring_lines(property, docstring_width))
-    lines.append("        return {}".format(get_property_declaration(property)))
-    return lines
-
-def get_function_code_lines(name, type):
-    lines = []
-    for function in type.bl_rna.functions:
-        lines.append("    def {}({}):".format(function.identifier, get_function_parameter_list(function)))
-        lines.extend(get_function_docstring_lines(function, docstring_width))
-        lines.append("        return {}".format(get_function_return_list(function)))
-
-    global collection_types
-    if name in collection_types:
-        subtype = collection_types[name]
-        lines.append("    def get(key): return {}()".format(subtype))
-        lines.append("    def __getitem__(key): return {}()".format(subtype))
-        lines.append("    def __iter__(key): yield {}()".format(subtype))
-
-    return lines
-
-def get_property_docstring_lines(property, width = 70, indent = 8):
-    lines = get_property_description_lines(property, width)
-    lines.extend(get_enum_item_lines(property, width))
-    return make_docstring_from_lines(lines, indent)
-
-def get_function_docstring_lines(function, width = 70, indent = 8):
-    lines = get_function_description_lines(function, width)
-    parameter_lines = get_parameter_lines(function, width)
-    lines.extend(parameter_lines)
-    return make_docstring_from_lines(lines, indent)
-
-def get_parameter_lines(function, width):
-    lines = []
-    params = [p for p in function.parameters if not p.is_output]
-    if len(params) > 0:
-        lines.append("")
-        lines.append("Parameter:")
-        lines.extend(get_parameter_list_lines(params, width))
-    returns = [p for p in function.parameters if p.is_output]
-    if len(returns) > 0:
-        lines.append("")
-        lines.append("Returns:")
-        lines.extend(get_parameter_list_lines(returns, width))
-    return lines
-
-def get_parameter_list_lines(params, width):
-    lines = []
-    for param in params:
-        lines.append("{}:".format(param.identifier))
-        description_lines = get_property_description_lines(param, width)
-        amount = len(description_lines)
-        if amount == 0: lines[-1] += " <no description available>"
-        elif amount == 1: lines[-1] += " " + description_lines[0]
-        else:
-            indent_lines(description_lines, 2)
-            lines.extend(description_lines)
-    indent_lines(lines, 2)
-    return lines
-
-def get_property_description_lines(property, width):
-    type = "({})".format(get_readable_property_type(property))
-    if property.description in (None, ""): return [type]
-    return textwrap.wrap(type + " " + property.description, width)
-
-def get_function_description_lines(function, width):
-    if function.description in (None, ""): return []
-    return textwrap.wrap(function.description, width)
-
-def get_enum_item_lines(property, width):
-    if getattr(property, "enum_items", None) is None: return []
-    items = property.enum_items
-    if len(items) == 0: return []
-    quote_mark = "'" if use_quote_marks else ""
-    item_string = "["+ ", ".join(quote_mark + item.identifier + quote_mark for item in items) +"]"
-    return [""] + textwrap.wrap(item_string, width)
-
-def make_docstring_from_lines(lines, indent = 8):
-    if len(lines) == 0: return []
-    lines[0] = "'''" + lines[0]
-    lines[-1] += "'''"
-    indent_lines(lines, indent)
-    return lines
-
-def indent_lines(lines, indent = 4):
-    spaces = " " * indent
-    for i in range(len(lines)):
-        lines[i] = spaces + lines[i]
-
-def get_dependencies(name, type):
-    def find_property_dependency(property):
-        if property.type == "POINTER":
-            dependencies.add(property.fixed_type.identifier)
-        if property.type == "COLLECTION":
-            if property.srna is None: dependencies.add(property.fixed_type.identifier)
-            else: dependencies.add(property.srna.identifier)
-
-    dependencies = set()
-    if name in collection_types:
-        dependencies.add(collection_types[name])
-    for property in get_type_properties(type):
-        find_property_dependency(property)
-    for function in type.bl_rna.functions:
-        for parameter in function.parameters:
-            find_property_dependency(parameter)
-    return dependencies
-
-def get_type_properties(type):
-    fakes = []
-    if type.bl_rna.identifier == "Context":
-        fakes = fake_context_properties
-    return list(type.bl_rna.properties) + fakes
-
-def get_function_parameter_list(function):
-    parameters = ["self"] + [parameter.identifier for parameter in function.parameters if not parameter.is_output]
-    return ", ".join(parameters)
-
-def get_function_return_list(function):
-    returns = [parameter for parameter in function.parameters if parameter.is_output]
-    return ", ".join([get_property_declaration(parameter) for parameter in returns])
-
-def get_property_declaration(property):
-    global collection_types
-    if property.type == "BOOLEAN": return "bool()"
-    if property.type == "INT": return "int()"
-    if property.type in ("STRING", "ENUM"): return "str()"
-    if property.type == "COLLECTION":
-        if property.srna is None: return "({}(),)".format(property.fixed_type.identifier)
-        else:
-            collection_types[property.srna.identifier] = property.fixed_type.identifier
-            return property.srna.identifier + "()"
-    if property.type == "FLOAT":
-        if property.array_length <= 1: return "float()"
-        if property.array_length in (2, 3): return "mathutils.Vector()"
-        if property.array_length == 16: return "mathutils.Matrix()"
-    if property.type == "POINTER":
-        return property.fixed_type.identifier + "()"
-    return "''"
-
-def write_code_file(name, code):
-    path = os.path.join(private_path, name.lower() + ".py")
-    file = open(path, "w+")
-    file.write(code)
-    file.close()
-
-
-
-
-bpy_struct_content = '''
-from . fcurve import FCurve
-
-class bpy_struct:
-    id_data = ID()
-    def as_pointer():
-        return int()
-    def driver_add(path, index):
-        return FCurve()
-    def driver_remove(path, index):
-        return bool()
-    def keyframe_delete(data_path, index, frame, group):
-        return bool()
-    def keyframe_insert(data_path, index, frame, group):
-        return bool()
-    def path_from_id(property):
-        return str()
-    def path_resolve(path, coerce):
-        return
-    def property_unsert(property):
-        return
-'''
 
 class FakeProp:
     def __init__(self, identifier):
@@ -1,6 +1,9 @@
 class Provider:
     def complete(self, text_block):
-        return []
+        return list(self.iter_completions(text_block))
+
+    def iter_completions(self, text_block):
+        return iter([])
 
 class Completion:
     def __getattr__(self, name):
@@ -8,6 +11,8 @@ class Completion:
             return ""
         if name == "description":
             return ""
+        if name == "description_pending":
+            return False
         if name == "type":
             return "UNKNOWN"
         if name == "finished_statement":
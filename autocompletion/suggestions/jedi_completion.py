@@ -1,6 +1,12 @@
+import os
 import re
+import bpy
 from . interface import Provider, Completion
-from . generate_fake_bpy import fake_package_name
+from . provider_runner import get_executor
+from . jedi_session import get_session, remove_closed_sessions, warm_up
+from . fake_bpy_cache import fake_bpy_cache
+from ... utils.lru_cache import LRUCache
+from . jedi_server_client import JediServerClient, JediServerStoppedError
 
 try: import jedi
 except: print("jedi library not found")
@@ -8,64 +14,178 @@ except: print("jedi library not found")
 def jedi_module_found():
     return "jedi" in globals()
 
-class JediCompletion(Completion):
-    def __init__(self, suggestion):
+# after this many requests in a row without an answer the server is not used anymore
+max_server_failures = 3
+
+# only the description of the active item is needed, so it is resolved on first access
+# and shared between completions of the same name in the same version of a text
+docstring_cache = LRUCache(max_size = 200)
+
+# source_key identifies the text and the version of its lines,
+# names without a full name (locals, parameters) are only cached on the completion
+def get_docstring_cache_key(source_key, full_name):
+    if full_name is None: return None
+    return source_key + (full_name, )
+
+# jedi is not thread-safe and the server can be slow, so the docstring is resolved
+# on the jedi worker and the description stays empty until it is available
+class LazyDocstringCompletion(Completion):
+    def __init__(self, cache_key):
+        self.cache_key = cache_key
+        self.docstring = None
+        self.docstring_future = None
+
+    @property
+    def description(self):
+        if self.docstring is None:
+            self.docstring = docstring_cache.get(self.cache_key)
+        if self.docstring is None:
+            if self.docstring_future is None:
+                self.docstring_future = get_executor("jedi").submit(self.get_docstring)
+            if not self.docstring_future.done(): return ""
+            try: docstring = self.docstring_future.result()
+            except: docstring = None
+            # failed lookups are not repeated for this completion
+            self.docstring = docstring or ""
+            if self.cache_key is not None and docstring is not None:
+                docstring_cache.set(self.cache_key, docstring)
+        return self.docstring
+
+    @property
+    def description_pending(self):
+        return self.docstring is None and self.docstring_future is not None
+
+    def get_docstring(self):
+        return None
+
+class JediCompletion(LazyDocstringCompletion):
+    def __init__(self, suggestion, source_key):
+        super().__init__(get_docstring_cache_key(source_key, getattr(suggestion, "full_name", None)))
+        self.suggestion = suggestion
         self.name = suggestion.name
-        self.description = suggestion.docstring()
-        if suggestion.type == "function": self.type = "FUNCTION"
-        if suggestion.type == "class": self.type = "CLASS"
-        if suggestion.type == "param":
-            self.type = "PARAMETER"
+        self.type = get_completion_type(suggestion.type)
+
+    def get_docstring(self):
+        return self.suggestion.docstring()
+
+    def insert(self, text_block):
+        text_block.replace_current_word(self.name)
+
+class ServerJediCompletion(LazyDocstringCompletion):
+    def __init__(self, data, session_name, index, server_client, source_key):
+        super().__init__(get_docstring_cache_key(source_key, data["full_name"]))
+        self.name = data["name"]
+        self.full_name = data["full_name"] or self.name
+        self.type = get_completion_type(data["type"])
+        self.session_name = session_name
+        self.index = index
+        self.server_client = server_client
+
+    def get_docstring(self):
+        return self.server_client.get_docstring(self.session_name, self.index, self.full_name)
 
     def insert(self, text_block):
         text_block.replace_current_word(self.name)
 
+def get_completion_type(jedi_type):
+    if jedi_type == "function": return "FUNCTION"
+    if jedi_type == "class": return "CLASS"
+    if jedi_type == "param": return "PARAMETER"
+    return "UNKNOWN"
+
 
 class JediCompletionProvider(Provider):
-    def complete(self, text_block):
-        source, line_index, character_index, filepath = get_completion_source(text_block)
+    def __init__(self):
+        self.use_server = False
+        self.server_unavailable = False
+        self.server_failures = 0
+        self.server_client = None
+        self.warm_up_state = "NOT_STARTED"
+        self.warm_up_progress = 0
+
+    def iter_completions(self, text_block):
+        if self.use_server and not self.server_unavailable and jedi_module_found():
+            try:
+                completions = self.complete_with_server(text_block)
+                self.server_failures = 0
+                return completions
+            except OSError:
+                # the server cannot be started, fall back to in-process completion
+                self.server_unavailable = True
+            except JediServerStoppedError:
+                # the server starts but dies or hangs (e.g. jedi is missing in its interpreter),
+                # don't restart it on every keystroke forever
+                self.server_failures += 1
+                if self.server_failures < max_server_failures: return []
+                print("The jedi server does not respond, using jedi in Blender instead")
+                self.server_unavailable = True
+            except:
+                return []
+
+        session = get_session(text_block.name, text_block.filepath)
+        session.update(text_block.get_all_lines())
+        source_key = (session.path, session.source_version)
 
         # jedi raises an error when trying to complete parts of the bpy module
         # or when the jedi module is not found
         try:
-            script = jedi.Script(source, line_index, character_index, filepath)
-            completions = script.completions()
-            ignored_words = (fake_package_name, "_bpy_path")
-            return [JediCompletion(c) for c in completions if c.name not in ignored_words]
+            completions = session.complete(text_block.current_line_index, len(text_block.text_before_cursor))
+            return [JediCompletion(c, source_key) for c in completions]
         except:
             return []
 
-def get_completion_source(text_block):
-    new_lines = []
-    corrected_line_number = 0
-    for line_number, line in enumerate(text_block.iter_lines()):
-        new_lines.extend(list(iter_corrected_lines_from_line(line)))
-        if line_number == text_block.current_line_index:
-            corrected_line_number = len(new_lines)
-    text = "\n".join(new_lines)
-
-    filepath = text_block.filepath
-    character_index = len(text_block.text_before_cursor)
-    return text, corrected_line_number, character_index, filepath
-
-def iter_corrected_lines_from_line(line):
-    if "bpy" in line:
-        line = line.replace("import bpy", "import {} as bpy".format(fake_package_name))
-        line = line.replace("from bpy", "from {}".format(fake_package_name))
-    yield line
-
-    if "def draw(self, context):" in line:
-        indentation = line.index("d") + 4
-        yield " " * indentation + "context = bpy.__private__.context.Context()"
-        yield " " * indentation + "self.layout = bpy.__private__.uilayout.UILayout()"
-
-    if "def execute(self, context):" in line or \
-       "def poll(cls, context):" in line:
-        indentation = line.index("d") + 4
-        yield " " * indentation + "context = bpy.__private__.context.Context()"
-
-    if "def invoke(self, context, event):" in line or \
-       "def modal(self, context, event):" in line:
-        indentation = line.index("d") + 4
-        yield " " * indentation + "context = bpy.__private__.context.Context()"
-        yield " " * indentation + "event = bpy.__private__.event.Event()"
+    # runs on the jedi worker, so the first real completion waits until it is done
+    def warm_up(self, use_server):
+        if not jedi_module_found() or self.warm_up_state == "RUNNING": return
+        self.warm_up_state = "RUNNING"
+        self.warm_up_progress = 0
+        get_executor("jedi").submit(self.run_warm_up, use_server)
+
+    def run_warm_up(self, use_server):
+        def set_progress(progress):
+            self.warm_up_progress = progress
+        try:
+            if use_server and not self.server_unavailable:
+                self.get_server_client().request("warm_up", timeout = 60)
+            else:
+                warm_up(set_progress)
+            self.warm_up_progress = 1
+            self.warm_up_state = "READY"
+        except:
+            self.warm_up_state = "FAILED"
+
+    def get_server_client(self):
+        sys_paths = get_server_sys_paths()
+        # the server has to be restarted when another fake bpy build becomes active
+        if self.server_client is not None and self.server_client.sys_paths != sys_paths:
+            self.server_client.stop()
+            self.server_client = None
+        if self.server_client is None:
+            self.server_client = JediServerClient(python_executable, sys_paths)
+        return self.server_client
+
+    def complete_with_server(self, text_block):
+        completions = self.get_server_client().complete(
+            text_block.name, text_block.filepath, text_block.get_all_lines(),
+            text_block.current_line_index, len(text_block.text_before_cursor))
+        source_key = (text_block.name, text_block.filepath, self.server_client.source_versions.get(text_block.name))
+        return [ServerJediCompletion(c, text_block.name, i, self.server_client, source_key) for i, c in enumerate(completions)]
+
+    def remove_closed_sessions(self, existing_names):
+        remove_closed_sessions(existing_names)
+        if self.server_client is not None:
+            self.server_client.forget_closed_sessions(existing_names)
+
+    def stop_server(self):
+        if self.server_client is not None:
+            self.server_client.stop()
+
+def get_python_executable():
+    return getattr(bpy.app, "binary_path_python", "python")
+
+# read once on import, the server is started from worker threads
+python_executable = get_python_executable()
+
+def get_server_sys_paths():
+    jedi_path = os.path.dirname(os.path.dirname(jedi.__file__))
+    return [path for path in (jedi_path, fake_bpy_cache.active_directory) if path is not None]
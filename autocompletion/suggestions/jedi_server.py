@@ -0,0 +1,99 @@
+'''
+Hosts jedi in a separate process so that parsing does not compete with
+Blenders UI for the GIL and a pathological file cannot hang the editor.
+
+Usage: python jedi_server.py [sys_path ...]
+
+Every line on stdin is a json request with an "id" and a "command",
+every line on stdout is a json response with the same "id" and either
+a "result" or an "error". The server only depends on the bpy independent
+modules next to it, so it can run in a plain Python interpreter.
+
+Commands:
+    complete: session, filepath, start, end, line_count, lines, line, column
+        Replaces the lines start:end of the session by lines and completes
+        at the given line index and column. When end is None all lines are replaced.
+        Returns {"resync" : True} when the server lost the state of the session.
+        Sessions are removed by the server when they have not been used for some time.
+        Descriptions are not included, they can be requested with the docstring command.
+    docstring: session, index, full_name
+        Docstring of a completion returned by the last complete request of the session.
+    warm_up
+        Parses the fake bpy package and common modules into the cache of jedi.
+    ping
+'''
+
+import os
+import sys
+import json
+import types
+import importlib
+
+class JediServer:
+    def __init__(self, session_module):
+        self.sessions = session_module
+        self.last_completions = {}
+
+    def handle(self, request):
+        command = request["command"]
+        if command == "complete": return self.complete(request)
+        if command == "docstring": return self.docstring(request)
+        if command == "warm_up": return self.sessions.warm_up()
+        if command == "ping": return "pong"
+        raise Exception("unknown command: {}".format(command))
+
+    def complete(self, request):
+        session = self.sessions.get_session(request["session"], request["filepath"])
+        source = session.corrected_source
+        end = request["end"]
+        if end is None: end = len(source.lines)
+        elif len(source.lines) != request["line_count"]: return {"resync" : True}
+
+        source.replace_lines(request["start"], end, request["lines"])
+        completions = session.complete(request["line"], request["column"])
+        self.last_completions[request["session"]] = completions
+        return {"completions" : [serialize_completion(c) for c in completions]}
+
+    def docstring(self, request):
+        completions = self.last_completions.get(request["session"], [])
+        index = request["index"]
+        if index >= len(completions): return None
+        completion = completions[index]
+        if get_full_name(completion) != request["full_name"]: return None
+        return completion.docstring()
+
+def serialize_completion(completion):
+    return {"name" : completion.name,
+            "type" : completion.type,
+            "full_name" : get_full_name(completion)}
+
+def get_full_name(completion):
+    return getattr(completion, "full_name", None) or completion.name
+
+def run(server, input, output):
+    for line in input:
+        request = json.loads(line.decode("utf-8"))
+        response = {"id" : request.get("id")}
+        try: response["result"] = server.handle(request)
+        except Exception as e: response["error"] = "{}: {}".format(type(e).__name__, e)
+        output.write((json.dumps(response) + "\n").encode("utf-8"))
+        output.flush()
+
+# import the bpy independent modules without running the __init__ of this package
+def import_session_module():
+    package_name = "code_autocomplete_jedi_server"
+    package = types.ModuleType(package_name)
+    package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+    sys.modules[package_name] = package
+    return importlib.import_module(package_name + ".jedi_session")
+
+def main():
+    # in front of site-packages, so that another installed jedi does not shadow the given one
+    sys.path[0:0] = sys.argv[1:]
+    input, output = sys.stdin.buffer, sys.stdout.buffer
+    # everything else that gets printed must not end up in the protocol
+    sys.stdout = sys.stderr
+    run(JediServer(import_session_module()), input, output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# This module must not depend on bpy.
+import os
+import json
+import queue
+import threading
+import itertools
+import subprocess
+from . line_cache import get_changed_line_range
+
+server_path = os.path.join(os.path.dirname(__file__), "jedi_server.py")
+
+class JediServerError(Exception):
+    pass
+
+# the server process died or did not answer in time
+class JediServerStoppedError(JediServerError):
+    pass
+
+# Talks to jedi_server.py over its stdin/stdout.
+# Only the lines that changed since the last request of a session are sent.
+class JediServerClient:
+    def __init__(self, python_path, sys_paths, timeout = 5):
+        self.python_path = python_path
+        self.sys_paths = sys_paths
+        self.timeout = timeout
+        self.process = None
+        self.responses = None
+        self.sent_lines = {}
+        # incremented whenever other lines than before are sent for a session
+        self.source_versions = {}
+        self.request_ids = itertools.count()
+        self.lock = threading.Lock()
+
+    @property
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self.process = subprocess.Popen([self.python_path, server_path] + self.sys_paths,
+            stdin = subprocess.PIPE, stdout = subprocess.PIPE)
+        self.responses = queue.Queue()
+        self.sent_lines.clear()
+        thread = threading.Thread(target = read_responses, args = (self.process.stdout, self.responses), daemon = True)
+        thread.start()
+
+    def stop(self):
+        if self.is_running:
+            self.process.kill()
+        self.process = None
+
+    def complete(self, name, filepath, lines, line_index, column):
+        try:
+            result = self.send_lines_and_complete(name, filepath, lines, line_index, column)
+            if result.get("resync", False):
+                self.sent_lines.pop(name, None)
+                result = self.send_lines_and_complete(name, filepath, lines, line_index, column)
+            self.sent_lines[name] = list(lines)
+            return result.get("completions", [])
+        except:
+            self.sent_lines.pop(name, None)
+            raise
+
+    def send_lines_and_complete(self, name, filepath, lines, line_index, column):
+        old_lines = self.sent_lines.get(name)
+        if old_lines is None: start, old_end, new_end = 0, None, len(lines)
+        else: start, old_end, new_end = get_changed_line_range(old_lines, lines)
+        if old_lines is None or not start == old_end == new_end:
+            self.source_versions[name] = self.source_versions.get(name, 0) + 1
+        return self.request("complete",
+            session = name, filepath = filepath,
+            start = start, end = old_end, line_count = len(old_lines or []),
+            lines = lines[start:new_end], line = line_index, column = column)
+
+    def get_docstring(self, name, index, full_name):
+        if not self.is_running: return None
+        return self.request("docstring", session = name, index = index, full_name = full_name)
+
+    def forget_closed_sessions(self, existing_names):
+        for name in list(self.sent_lines.keys()):
+            if name not in existing_names:
+                self.sent_lines.pop(name, None)
+                self.source_versions.pop(name, None)
+
+    # timeout: how long to wait for the response (default is self.timeout)
+    def request(self, command, timeout = None, **arguments):
+        with self.lock:
+            if not self.is_running: self.start()
+            request_id = next(self.request_ids)
+            message = dict(arguments, command = command, id = request_id)
+            try:
+                self.process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+                self.process.stdin.flush()
+                response = self.wait_for_response(request_id, timeout or self.timeout)
+            except (OSError, queue.Empty):
+                # the server crashed or hangs, it will be restarted with the next request
+                self.stop()
+                raise JediServerStoppedError("no response from the jedi server")
+
+        if "error" in response: raise JediServerError(response["error"])
+        return response["result"]
+
+    def wait_for_response(self, request_id, timeout):
+        while True:
+            response = self.responses.get(timeout = timeout)
+            if response is None: raise OSError("jedi server stopped")
+            # responses of requests that timed out earlier are skipped
+            if response.get("id") == request_id: return response
+
+def read_responses(output, responses):
+    for line in output:
+        responses.put(json.loads(line.decode("utf-8")))
+    responses.put(None)
@@ -0,0 +1,116 @@
+# This module must not depend on bpy (it is also used by the jedi server process).
+import os
+import time
+import tempfile
+import threading
+from collections import OrderedDict
+from . jedi_source import CorrectedSource, ignored_names, fake_package_name
+
+try: import jedi
+except: pass
+
+max_sessions = 10
+max_session_age = 600
+max_cached_positions = 20
+
+# Keeps the state of jedi for one text block between keystrokes.
+# Jedi caches its parser per module path and only reparses the changed parts
+# when the same path is used again, so every text block gets its own stable path.
+class JediSession:
+    def __init__(self, name, filepath):
+        self.name = name
+        self.path = get_session_path(name, filepath)
+        self.corrected_source = CorrectedSource()
+        # incremented whenever the lines change
+        self.source_version = 0
+        self.source = None
+        self.completions = {}
+        self.last_used = time.time()
+
+    def update(self, lines):
+        if self.corrected_source.update(lines):
+            self.source_version += 1
+
+    # line_index refers to the original lines in self.corrected_source
+    def complete(self, line_index, column):
+        source = self.corrected_source.text
+        line = self.corrected_source.get_corrected_line_number(line_index)
+        completions = self.get_completions(source, line, column)
+        return [c for c in completions if c.name not in ignored_names]
+
+    def get_completions(self, source, line, column):
+        if source != self.source or len(self.completions) > max_cached_positions:
+            self.source = source
+            self.completions.clear()
+
+        position = (line, column)
+        if position not in self.completions:
+            script = jedi.Script(source, line, column, self.path)
+            self.completions[position] = script.completions()
+        return self.completions[position]
+
+    def free(self):
+        try: jedi.cache.parser_cache.pop(self.path, None)
+        except: pass
+
+def get_session_path(name, filepath):
+    if filepath != "": return filepath
+    return os.path.join(tempfile.gettempdir(), "code_autocomplete", name)
+
+sessions = OrderedDict()
+sessions_lock = threading.Lock()
+
+def get_session(name, filepath):
+    with sessions_lock:
+        session = sessions.get(name)
+        if session is None or session.path != get_session_path(name, filepath):
+            if session is not None: session.free()
+            session = JediSession(name, filepath)
+            sessions[name] = session
+        session.last_used = time.time()
+        sessions.move_to_end(name)
+        remove_stale_sessions()
+        return session
+
+def remove_stale_sessions():
+    now = time.time()
+    for name, session in list(sessions.items()):
+        if len(sessions) > max_sessions or now - session.last_used > max_session_age:
+            remove_session(name)
+
+# called with the names of all texts that are still open
+def remove_closed_sessions(existing_names):
+    with sessions_lock:
+        for name in list(sessions.keys()):
+            if name not in existing_names:
+                remove_session(name)
+
+def remove_session(name):
+    sessions.pop(name).free()
+
+
+warm_up_modules = [
+    fake_package_name,
+    fake_package_name + ".__private__.context",
+    fake_package_name + ".__private__.uilayout",
+    fake_package_name + ".__private__.event",
+    fake_package_name + ".__private__.blenddata",
+    "os", "re", "sys", "math", "random" ]
+
+warm_up_source = """import {} as bpy
+class Operator:
+    def execute(self, context):
+        context = bpy.__private__.context.Context()
+        context.""".format(fake_package_name)
+
+# parses the modules that are needed by almost every completion into jedis cache
+def warm_up(progress_callback = None):
+    steps = len(warm_up_modules) + 1
+    for i, name in enumerate(warm_up_modules):
+        try: jedi.preload_module(name)
+        except: pass
+        if progress_callback: progress_callback((i + 1) / steps)
+
+    lines = warm_up_source.split("\n")
+    jedi.Script(warm_up_source, len(lines), len(lines[-1]), None).completions()
+    if progress_callback: progress_callback(1)
@@ -0,0 +1,57 @@
+# This module must not depend on bpy (it is also used by the jedi server process).
+from . line_cache import LineCache
+
+fake_package_name = "_bpy_fake"
+ignored_names = (fake_package_name, "_bpy_path")
+
+# Source code for jedi with bpy replaced by the fake package and with
+# fake context/event objects injected into operator and panel functions.
+# Only edited lines get corrected again.
+class CorrectedSource(LineCache):
+    def __init__(self):
+        super().__init__()
+        self.offsets = [0]
+        self.joined_text = None
+
+    def calculate_value(self, line):
+        return tuple(iter_corrected_lines_from_line(line))
+
+    def values_changed(self, start, old_values, new_values):
+        self.joined_text = None
+        if len(old_values) == len(new_values) and \
+           all(len(old) == len(new) for old, new in zip(old_values, new_values)): return
+        del self.offsets[start + 1:]
+        for corrected_lines in self.values[start:]:
+            self.offsets.append(self.offsets[-1] + len(corrected_lines))
+
+    @property
+    def text(self):
+        if self.joined_text is None:
+            self.joined_text = "\n".join(line for lines in self.values for line in lines)
+        return self.joined_text
+
+    # line number in the corrected text that jedi should complete
+    def get_corrected_line_number(self, line_index):
+        return self.offsets[line_index + 1]
+
+def iter_corrected_lines_from_line(line):
+    if "bpy" in line:
+        line = line.replace("import bpy", "import {} as bpy".format(fake_package_name))
+        line = line.replace("from bpy", "from {}".format(fake_package_name))
+    yield line
+
+    if "def draw(self, context):" in line:
+        indentation = line.index("d") + 4
+        yield " " * indentation + "context = bpy.__private__.context.Context()"
+        yield " " * indentation + "self.layout = bpy.__private__.uilayout.UILayout()"
+
+    if "def execute(self, context):" in line or \
+       "def poll(cls, context):" in line:
+        indentation = line.index("d") + 4
+        yield " " * indentation + "context = bpy.__private__.context.Context()"
+
+    if "def invoke(self, context, event):" in line or \
+       "def modal(self, context, event):" in line:
+        indentation = line.index("d") + 4
+        yield " " * indentation + "context = bpy.__private__.context.Context()"
+        yield " " * indentation + "event = bpy.__private__.event.Event()"
@@ -0,0 +1,40 @@
+# This module must not depend on bpy (it is also used by the jedi server process).
+
+# returns start, old_end, new_end so that only old_lines[start:old_end]
+# have been replaced by new_lines[start:new_end]
+def get_changed_line_range(old_lines, new_lines):
+    start = 0
+    max_start = min(len(old_lines), len(new_lines))
+    while start < max_start and old_lines[start] == new_lines[start]:
+        start += 1
+
+    old_end, new_end = len(old_lines), len(new_lines)
+    while old_end > start and new_end > start and old_lines[old_end - 1] == new_lines[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    return start, old_end, new_end
+
+# Derives a value from every line and only recalculates it for lines that changed.
+class LineCache:
+    def __init__(self):
+        self.lines = []
+        self.values = []
+
+    def update(self, lines):
+        start, old_end, new_end = get_changed_line_range(self.lines, lines)
+        if start == old_end == new_end: return False
+        self.replace_lines(start, old_end, lines[start:new_end])
+        return True
+
+    def replace_lines(self, start, end, new_lines):
+        old_values = self.values[start:end]
+        new_values = [self.calculate_value(line) for line in new_lines]
+        self.lines[start:end] = new_lines
+        self.values[start:end] = new_values
+        self.values_changed(start, old_values, new_values)
+
+    def calculate_value(self, line):
+        raise NotImplementedError()
+
+    def values_changed(self, start, old_values, new_values):
+        pass
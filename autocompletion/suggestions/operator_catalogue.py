@@ -0,0 +1,117 @@
+import bpy
+from ... utils.lru_cache import LRUCache
+from . fuzzy_matching import get_character_mask
+from . rna_utils import (get_operator_parameters,
+                         get_enum_parameter_pattern,
+                         get_property_default,
+                         get_readable_property_type,
+                         get_enum_items,
+                         clear_rna_cache)
+
+# Everything the operator completion needs to know about bpy.ops.
+# It is filled on the main thread and only contains plain data, so that
+# the provider can read it from its worker thread without touching RNA.
+# Names are collected again when operators have been (re-)registered, the
+# parameters of an operator are copied when the cursor is inside a call of it.
+class OperatorCatalogue:
+    def __init__(self):
+        self.operators_key = None
+        self.category_names = []
+        self.category_masks = []
+        self.operator_names = {}
+        self.operator_masks = {}
+        self.operator_infos = {}
+        # formatted help texts, only built for the rows that are displayed
+        self.descriptions = LRUCache(max_size = 200)
+
+    # must be called from the main thread
+    def update(self, text_block):
+        operators_key = get_operators_key()
+        if operators_key != self.operators_key:
+            self.build()
+            self.operators_key = operators_key
+
+        idname = get_current_operator_idname(text_block)
+        if idname is not None and idname not in self.operator_infos:
+            self.operator_infos[idname] = OperatorInfo(self.get_operator(idname))
+
+    def invalidate(self):
+        self.operators_key = None
+        self.descriptions.clear()
+        clear_rna_cache()
+
+    def build(self):
+        operator_names, operator_masks = {}, {}
+        for category_name in dir(bpy.ops):
+            names = dir(getattr(bpy.ops, category_name))
+            operator_names[category_name] = names
+            operator_masks[category_name] = [get_character_mask(name) for name in names]
+
+        self.operator_names = operator_names
+        self.operator_masks = operator_masks
+        self.category_names = sorted(operator_names.keys())
+        self.category_masks = [get_character_mask(name) for name in self.category_names]
+        self.operator_infos = {}
+        self.descriptions.clear()
+        clear_rna_cache()
+
+    def iter_categories(self):
+        return zip(self.category_names, self.category_masks)
+
+    def iter_operators(self, category_name):
+        return zip(self.operator_names.get(category_name, []), self.operator_masks.get(category_name, []))
+
+    def has_operator(self, idname):
+        category_name, _, operator_name = idname.partition(".")
+        return operator_name in self.operator_names.get(category_name, [])
+
+    # None when the operator has not been prepared by update yet
+    def get_operator_info(self, idname):
+        return self.operator_infos.get(idname)
+
+    # idname: 'category.operator_name', must be called from the main thread
+    def get_operator(self, idname):
+        if not self.has_operator(idname): return None
+        category_name, operator_name = idname.split(".")
+        return getattr(getattr(bpy.ops, category_name), operator_name)
+
+class OperatorInfo:
+    def __init__(self, operator):
+        self.parameters = [OperatorParameter(property) for property in get_operator_parameters(operator)]
+        self.enum_parameter_pattern = get_enum_parameter_pattern(operator)
+
+    def get_parameter(self, identifier):
+        for parameter in self.parameters:
+            if parameter.identifier == identifier:
+                return parameter
+
+class OperatorParameter:
+    def __init__(self, property):
+        self.identifier = property.identifier
+        self.name = property.name
+        self.description = property.description
+        self.type_name = get_readable_property_type(property)
+        self.default = get_property_default(property)
+        self.enum_items = get_enum_items(property)
+
+# Changes when addons are toggled and when operators are registered from Python,
+# e.g. by running a script in the text editor. Registering a class again with
+# changed properties creates a new subclass, so the key changes as well.
+def get_operators_key():
+    addons = tuple(sorted(bpy.context.user_preferences.addons.keys()))
+    operator_classes = frozenset(id(cls) for cls in bpy.types.Operator.__subclasses__())
+    return addons, len(dir(bpy.ops)), operator_classes
+
+# "bpy.ops.text.move(type = 'L" -> "text.move"
+def get_current_operator_idname(text_block):
+    function_path = text_block.get_current_function_path()
+    if function_path is None: return None
+
+    parts = function_path.split(".")
+    if len(parts) != 4: return None
+    if not function_path.startswith("bpy.ops"): return None
+    idname = ".".join(parts[2:])
+    if not operator_catalogue.has_operator(idname): return None
+    return idname
+
+operator_catalogue = OperatorCatalogue()
@@ -1,13 +1,9 @@
-import re
-import bpy
-import textwrap
 from . interface import Provider, Completion
-from . rna_utils import (get_enum_items,
-                         get_property_default,
-                         get_enum_items_string,
-                         get_operator_parameters,
-                         make_operator_description,
-                         get_readable_property_type)
+from . fuzzy_matching import FuzzyMatcher
+from . operator_catalogue import operator_catalogue, get_current_operator_idname
+from . rna_utils import make_operator_description, format_enum_items
+
+description_width = 70
 
 
 class WordCompletion(Completion):
@@ -18,51 +14,63 @@ class WordCompletion(Completion):
         text_block.replace_current_word(self.name)
 
 class OperatorCompletion(Completion):
-    def __init__(self, category, operator_name):
-        self.operator = getattr(category, operator_name)
+    def __init__(self, category_name, operator_name):
+        self.idname = category_name + "." + operator_name
         self.name = operator_name
 
     def insert(self, text_block):
         text_block.replace_current_word(self.name)
 
+    # only used for drawing, so it runs on the main thread
     @property
     def description(self):
-        return make_operator_description(self.operator)
+        key = (self.idname, description_width)
+        description = operator_catalogue.descriptions.get(key)
+        if description is None:
+            operator = operator_catalogue.get_operator(self.idname)
+            if operator is None: return ""
+            description = make_operator_description(operator, description_width)
+            operator_catalogue.descriptions.set(key, description)
+        return description
 
 class ParameterCompletion(Completion):
-    def __init__(self, parameter):
+    def __init__(self, idname, parameter):
+        self.idname = idname
+        self.parameter = parameter
         self.name = parameter.identifier + " = "
         self.type = "OPERATOR_PARAMETER"
-        self.description = "{} ({}) = {}\n\n{}\n{}".format(
-                                parameter.name,
-                                get_readable_property_type(parameter),
-                                get_property_default(parameter),
-                                parameter.description,
-                                get_enum_items_string(parameter, 70))
+
+    @property
+    def description(self):
+        key = (self.idname, self.parameter.identifier, description_width)
+        description = operator_catalogue.descriptions.get(key)
+        if description is None:
+            description = make_parameter_description(self.parameter, description_width)
+            operator_catalogue.descriptions.set(key, description)
+        return description
 
     def insert(self, text_block):
         text_block.replace_current_word(self.name)
 
 
 class OperatorCompletionProvider(Provider):
-    def complete(self, text_block):
+    def iter_completions(self, text_block):
         current_word = text_block.current_word
         parents = text_block.parents_of_current_word
-        operator = get_current_operator(text_block)
 
         if parents[:1] == ["bpy"]:
             if len(parents) == 1 and "ops".startswith(current_word):
-                return [WordCompletion("ops")]
+                yield WordCompletion("ops")
+                return
 
-        operator = get_current_operator(text_block)
-        if operator is not None:
-            return list(iter_operator_inner_completions(operator, text_block))
+        idname = get_current_operator_idname(text_block)
+        if idname is not None:
+            yield from iter_operator_inner_completions(idname, text_block)
+            return
 
-        completions = []
-        completions.extend(iter_operator_completion_after_pattern(text_block, "bpy\.ops\."))
-        completions.extend(iter_operator_completion_after_pattern(text_block, "\.operator\((\"|\')"))
-        completions.extend(iter_operator_completion_after_pattern(text_block, "keymap_items\.new\((\"|\')"))
-        return completions
+        yield from iter_operator_completion_after_pattern(text_block, "bpy\.ops\.")
+        yield from iter_operator_completion_after_pattern(text_block, "\.operator\((\"|\')")
+        yield from iter_operator_completion_after_pattern(text_block, "keymap_items\.new\((\"|\')")
 
 # pattern#text#.#move#
 def iter_operator_completion_after_pattern(text_block, pattern = ""):
@@ -76,50 +84,53 @@ def iter_operator_completion_after_pattern(text_block, pattern = ""):
 
 # bpy.ops.#text#
 def get_category_completions(current_word):
-    return [WordCompletion(category) for category in dir(bpy.ops) if category.startswith(current_word)]
+    matcher = FuzzyMatcher(current_word)
+    return [WordCompletion(category) for category, mask in operator_catalogue.iter_categories()
+            if matcher.matches(category, mask)]
 
 # bpy.ops.text.#move#
 def iter_operator_completions(current_word, category_name):
-    category = getattr(bpy.ops, category_name, None)
-    if category is None: return
-    for operator_name in dir(category):
-        if current_word not in operator_name: continue
-        yield OperatorCompletion(category, operator_name)
-
-def get_current_operator(text_block):
-    function_path = text_block.get_current_function_path()
-    if function_path is None: return None
-
-    parts = function_path.split(".")
-    if len(parts) != 4: return None
-    if not function_path.startswith("bpy.ops"): return None
-    category_name, operator_name = parts[2:]
-    category = getattr(bpy.ops, category_name, None)
-    if category is None: return None
-    operator = getattr(category, operator_name, None)
-    return operator
+    matcher = FuzzyMatcher(current_word)
+    for operator_name, mask in operator_catalogue.iter_operators(category_name):
+        if not matcher.matches(operator_name, mask): continue
+        yield OperatorCompletion(category_name, operator_name)
 
 # bpy.ops.text.move(#type# = "#NEXT_CHARACTER#")
-def iter_operator_inner_completions(operator, text_block):
-    yield from iter_parameter_completions(operator, text_block)
-    yield from iter_enum_parameter_completions(operator, text_block)
+def iter_operator_inner_completions(idname, text_block):
+    operator_info = operator_catalogue.get_operator_info(idname)
+    if operator_info is None: return
+    yield from iter_parameter_completions(idname, operator_info, text_block)
+    yield from iter_enum_parameter_completions(operator_info, text_block)
 
 # bpy.ops.text.move(#type# = "NEXT_CHARACTER")
-def iter_parameter_completions(operator, text_block):
+def iter_parameter_completions(idname, operator_info, text_block):
     word_start = text_block.get_current_text_after_pattern("[\(\,]\s*")
     if word_start is None: return
-    for parameter in get_operator_parameters(operator):
-        if word_start in parameter.identifier:
-            yield ParameterCompletion(parameter)
+    matcher = FuzzyMatcher(word_start)
+    for parameter in operator_info.parameters:
+        if matcher.matches(parameter.identifier):
+            yield ParameterCompletion(idname, parameter)
 
 # bpy.ops.text.move(type = "#NEXT_CHARACTER#")
-def iter_enum_parameter_completions(operator, text_block):
-    for parameter in get_operator_parameters(operator):
-        pattern = parameter.identifier + "\s*=\s*(\"|\')"
-        word_start = text_block.get_current_text_after_pattern(pattern)
-        if word_start is None: continue
-        word_start = word_start.upper()
-        for enum_item in get_enum_items(parameter):
-            if word_start in enum_item.upper():
-                completion = WordCompletion(enum_item)
-                yield completion
+def iter_enum_parameter_completions(operator_info, text_block):
+    pattern = operator_info.enum_parameter_pattern
+    if pattern is None: return
+    text = text_block.text_before_cursor
+    match = text_block.get_last_match(pattern, text)
+    if match is None: return
+
+    word_start = text[match.end():]
+    parameter = operator_info.get_parameter(match.group("identifier"))
+    matcher = FuzzyMatcher(word_start)
+    for enum_item in parameter.enum_items:
+        if matcher.matches(enum_item):
+            completion = WordCompletion(enum_item)
+            yield completion
+
+def make_parameter_description(parameter, width):
+    return "{} ({}) = {}\n\n{}\n{}".format(
+                parameter.name,
+                parameter.type_name,
+                parameter.default,
+                parameter.description,
+                format_enum_items(parameter.enum_items, width))
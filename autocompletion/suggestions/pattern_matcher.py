@@ -0,0 +1,56 @@
+import re
+from collections import OrderedDict
+
+# This module must not depend on bpy.
+
+# the text between the end of a pattern and the cursor
+fragment_pattern = r"[^'\".,()\[\]{}=]*"
+
+# All patterns are compiled into one regular expression that only matches
+# when the text after the pattern reaches the cursor:
+#     (?:pattern0(?P<f0>fragment)\Z|pattern1(?P<f1>fragment)\Z|...)
+# The fragment group closes last, so match.lastgroup tells which pattern matched.
+# The patterns must not contain named groups or numbered backreferences.
+class PatternMatcher:
+    def __init__(self, entries):
+        self.entries = merge_entries(entries)
+        alternatives = [get_alternative(pattern, i) for i, (pattern, words) in enumerate(self.entries)]
+        if len(alternatives) == 0: self.regex = None
+        else: self.regex = re.compile("|".join(alternatives))
+        # used to find other patterns that match at the same position
+        self.alternative_regexes = [re.compile(alternative) for alternative in alternatives]
+
+    def __len__(self):
+        return len(self.entries)
+
+    # yields (words, fragment) for every pattern that ends right before the fragment at the end of the text
+    def iter_matches(self, text):
+        if self.regex is None: return
+        fragments = {}
+        position = 0
+        while True:
+            match = self.regex.search(text, position)
+            if match is None: break
+            index = int(match.lastgroup[1:])
+            fragments[index] = match.group(match.lastgroup)
+            # the alternation only reports the first pattern that matches at this position
+            for other_index in range(index + 1, len(self.entries)):
+                other_match = self.alternative_regexes[other_index].match(text, match.start())
+                if other_match is not None:
+                    fragments[other_index] = other_match.group(other_match.lastgroup)
+            position = match.start() + 1
+
+        for index in sorted(fragments.keys()):
+            yield self.entries[index][1], fragments[index]
+
+def get_alternative(pattern, index):
+    return "(?:{})(?P<f{}>{})\\Z".format(pattern, index, fragment_pattern)
+
+# the words of identical patterns are combined
+def merge_entries(entries):
+    words_by_pattern = OrderedDict()
+    for pattern, words in entries:
+        merged_words = words_by_pattern.setdefault(pattern, [])
+        for word in words:
+            if word not in merged_words: merged_words.append(word)
+    return list(words_by_pattern.items())
@@ -0,0 +1,97 @@
+import os
+import bpy
+import time
+import threading
+from . word_index import WordIndex, get_word_index
+from ... addon_development.utils import current_addon_exists, get_current_addon_path, ignore_names
+
+text_update_interval = 1
+file_update_interval = 2
+
+# Words of the other open texts and of the files of the current addon.
+# Open texts are indexed by the main thread, files by the word completion provider.
+class ProjectWords:
+    def __init__(self):
+        self.text_names = []
+        self.text_filepaths = set()
+        self.directory = None
+        self.file_indices = {}
+        self.last_text_update = 0
+        self.last_file_update = 0
+        self.lock = threading.Lock()
+
+    # must be called from the main thread
+    def update_texts(self, current_name):
+        if time.time() - self.last_text_update < text_update_interval: return
+        self.last_text_update = time.time()
+
+        for text in bpy.data.texts:
+            if text.name == current_name: continue
+            index = get_word_index(text.name)
+            lines = [line.body for line in text.lines]
+            with index.lock:
+                index.update(lines)
+
+        with self.lock:
+            self.text_names = [text.name for text in bpy.data.texts]
+            self.text_filepaths = {os.path.normpath(bpy.path.abspath(text.filepath)) for text in bpy.data.texts if text.filepath != ""}
+            self.directory = get_current_addon_path() if current_addon_exists() else None
+
+    # the lock is only held to read the state and to swap in the new indices,
+    # so the main thread never waits for the file system
+    def update_files(self):
+        if time.time() - self.last_file_update < file_update_interval: return
+        self.last_file_update = time.time()
+
+        with self.lock:
+            directory = self.directory
+            text_filepaths = self.text_filepaths
+            old_indices = self.file_indices
+
+        paths = set(iter_python_files(directory)) if directory else set()
+        paths -= text_filepaths
+        file_indices = {}
+        for path in paths:
+            file_index = update_file_index(path, old_indices.get(path))
+            if file_index is not None: file_indices[path] = file_index
+
+        with self.lock:
+            self.file_indices = file_indices
+
+    # word indices of other texts and of files, ordered by locality
+    def get_indices(self, current_name):
+        self.update_files()
+        with self.lock:
+            text_indices = [get_word_index(name) for name in self.text_names if name != current_name]
+            file_indices = list(self.file_indices.values())
+        return [text_indices, file_indices]
+
+class FileWordIndex(WordIndex):
+    def __init__(self):
+        super().__init__()
+        self.modification_time = None
+
+# returns None when the file cannot be read
+def update_file_index(path, file_index):
+    try: modification_time = os.path.getmtime(path)
+    except OSError: return None
+    if file_index is not None and file_index.modification_time == modification_time: return file_index
+
+    try:
+        with open(path, encoding = "utf-8", errors = "ignore") as file:
+            lines = file.read().split("\n")
+    except OSError: return None
+    if file_index is None: file_index = FileWordIndex()
+    with file_index.lock:
+        file_index.update(lines)
+    file_index.modification_time = modification_time
+    return file_index
+
+def iter_python_files(directory):
+    for root, directory_names, file_names in os.walk(directory):
+        directory_names[:] = [name for name in directory_names if name not in ignore_names]
+        for name in file_names:
+            if name.endswith(".py"):
+                yield os.path.normpath(os.path.join(root, name))
+
+project_words = ProjectWords()
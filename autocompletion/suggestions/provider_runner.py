@@ -0,0 +1,122 @@
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class ProviderStatistics:
+    def __init__(self):
+        self.calls = 0
+        self.budget_hits = 0
+        self.total_time = 0
+
+    @property
+    def average_time(self):
+        return self.total_time / max(self.calls, 1)
+
+provider_statistics = defaultdict(ProviderStatistics)
+
+# the cheap providers share a pool, slow providers get an isolated worker
+# so that a run that exceeded its budget can finish in the background
+# without blocking the other providers or running in parallel to the next run
+isolated_providers = {"jedi"}
+cheap_provider_pool = ThreadPoolExecutor(max_workers = 3)
+isolated_executors = {}
+
+# a new run cancels the previous run of the same provider,
+# so runs for outdated snapshots that are still queued do nothing
+latest_runs = {}
+latest_runs_lock = threading.Lock()
+
+class ProviderRun:
+    def __init__(self, name, provider, text_block, budget):
+        self.name = name
+        self.provider = provider
+        self.text_block = text_block
+        self.budget = budget
+        self.completions = []
+        self.cancelled = threading.Event()
+        self.future = None
+        self.start_time = 0
+
+    def start(self):
+        with latest_runs_lock:
+            previous_run = latest_runs.get(self.name)
+            if previous_run is not None: previous_run.cancelled.set()
+            latest_runs[self.name] = self
+        self.start_time = time.perf_counter()
+        self.future = get_executor(self.name).submit(self.run)
+
+    def run(self):
+        if self.cancelled.is_set(): return []
+        for completion in self.provider.iter_completions(self.text_block):
+            if self.cancelled.is_set(): break
+            self.completions.append(completion)
+        return self.completions
+
+    @property
+    def remaining_time(self):
+        if self.budget <= 0: return None
+        return max(self.start_time + self.budget - time.perf_counter(), 0)
+
+    @property
+    def is_finished(self):
+        return self.future.done() or self.remaining_time == 0
+
+    def wait_and_finish(self):
+        wait([self.future], timeout = self.remaining_time)
+        return self.finish()
+
+    # returns everything the provider found within the budget,
+    # a run that exceeded it keeps going until it finishes or is superseded
+    def finish(self):
+        statistics = provider_statistics[self.name]
+        statistics.calls += 1
+        statistics.total_time += time.perf_counter() - self.start_time
+
+        if not self.future.done():
+            statistics.budget_hits += 1
+            return list(self.completions)
+        try: return self.future.result()
+        except: return []
+
+# calls on_update with (name, completions) of all runs that are finished (in the given order),
+# runs that exceeded their budget call it again from their worker when they finish late
+def run_providers_concurrently(runs, on_update):
+    for run in runs:
+        run.start()
+
+    results = {}
+    results_lock = threading.Lock()
+    late_runs = []
+    while len(results) < len(runs):
+        pending = [run for run in runs if run not in results]
+        timeouts = [run.remaining_time for run in pending if run.remaining_time is not None]
+        wait([run.future for run in pending],
+             timeout = min(timeouts) if len(timeouts) > 0 else None,
+             return_when = FIRST_COMPLETED)
+
+        for run in pending:
+            if run.is_finished:
+                if not run.future.done(): late_runs.append(run)
+                results[run] = run.finish()
+        on_update([(run.name, results[run]) for run in runs if run in results])
+
+    def publish_late_result(late_run):
+        if late_run.cancelled.is_set(): return
+        try: completions = late_run.future.result()
+        except: return
+        with results_lock:
+            results[late_run] = completions
+            on_update([(run.name, results[run]) for run in runs])
+
+    for late_run in late_runs:
+        late_run.future.add_done_callback(lambda future, late_run = late_run: publish_late_result(late_run))
+
+def get_executor(name):
+    if name not in isolated_providers: return cheap_provider_pool
+    if name not in isolated_executors:
+        isolated_executors[name] = ThreadPoolExecutor(max_workers = 1)
+    return isolated_executors[name]
+
+def reset_provider_statistics():
+    provider_statistics.clear()
@@ -0,0 +1,88 @@
+import heapq
+from itertools import count
+from . fuzzy_matching import FuzzyMatcher
+
+provider_priorities = {"static_pattern" : 0, "operator" : 1, "jedi" : 2, "word" : 3}
+type_priorities = {"OPERATOR_PARAMETER" : 0, "PARAMETER" : 1}
+
+# decides which completion is kept when multiple providers return the same name
+merge_precedences = {"jedi" : 0, "operator" : 0, "static_pattern" : 1, "word" : 2}
+
+recently_used = {}
+usage_counter = count(1)
+max_recently_used = 100
+
+def mark_as_used(name):
+    recently_used[name] = next(usage_counter)
+    if len(recently_used) > max_recently_used:
+        del recently_used[min(recently_used, key = recently_used.get)]
+
+# smaller is better
+def get_rank_key(completion, provider_priority, matcher):
+    name = completion.name
+    if name.startswith(matcher.query): match = 0
+    elif name.lower().startswith(matcher.lower_query): match = 1
+    else: match = 2
+    return (type_priorities.get(completion.type, 2),
+            match,
+            -recently_used.get(name, 0),
+            -(matcher.score(name) or 0) if match == 2 else 0,
+            provider_priority)
+
+# Behaves like a list of completions sorted by rank.
+# Only the items that are accessed are sorted (in pages using a bounded heap).
+class RankedCompletions:
+    def __init__(self, candidates, word = "", page_size = 30):
+        # candidates: [(provider_name, completion), ...]
+        self.candidates = candidates
+        self.word = word
+        self.page_size = page_size
+        self.sorted_completions = []
+        self.keys = None
+
+    @classmethod
+    def from_results(cls, results, word = ""):
+        return cls(deduplicate_results(results), word)
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def __getitem__(self, index):
+        if index < 0: index += len(self)
+        if not 0 <= index < len(self): raise IndexError()
+        if index >= len(self.sorted_completions):
+            self.materialize(index + self.page_size)
+        return self.sorted_completions[index]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def materialize(self, amount):
+        if self.keys is None: self.keys = self.calculate_keys()
+        top = heapq.nsmallest(amount, self.keys)
+        self.sorted_completions = [self.candidates[index][1] for key, index in top]
+
+    def calculate_keys(self):
+        matcher = FuzzyMatcher(self.word)
+        return [(get_rank_key(completion, provider_priorities.get(name, 4), matcher), index)
+                for index, (name, completion) in enumerate(self.candidates)]
+
+    def filter(self, word):
+        matcher = FuzzyMatcher(word)
+        candidates = [(name, c) for name, c in self.candidates if matcher.matches(c.name)]
+        return RankedCompletions(candidates, word, self.page_size)
+
+def deduplicate_results(results):
+    candidates = []
+    index_by_name = {}
+    for provider_name, completions in results:
+        precedence = merge_precedences.get(provider_name, 3)
+        for completion in completions:
+            index = index_by_name.get(completion.name)
+            if index is None:
+                index_by_name[completion.name] = len(candidates)
+                candidates.append((provider_name, completion))
+            elif precedence < merge_precedences.get(candidates[index][0], 3):
+                candidates[index] = (provider_name, completion)
+    return candidates
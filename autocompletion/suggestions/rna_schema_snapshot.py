@@ -0,0 +1,40 @@
+import json
+
+# This module must not depend on bpy.
+# A snapshot stores the schema that generate_fake_bpy extracts (see fake_bpy_rendering),
+# so that the fake bpy package can be built without Blender.
+# The fake context properties are part of the Context type in the schema.
+
+try: import msgpack
+except ImportError: msgpack = None
+
+snapshot_format = 1
+
+def save_snapshot(path, schema, blender_version):
+    snapshot = {
+        "format" : snapshot_format,
+        "blender_version" : list(blender_version),
+        "schema" : schema }
+    if is_msgpack_path(path):
+        with open(path, "wb") as file:
+            file.write(msgpack.packb(snapshot, use_bin_type = True))
+    else:
+        with open(path, "w") as file:
+            json.dump(snapshot, file, separators = (",", ":"), sort_keys = True)
+
+def load_snapshot(path):
+    if is_msgpack_path(path):
+        with open(path, "rb") as file:
+            snapshot = msgpack.unpackb(file.read(), raw = False)
+    else:
+        with open(path) as file:
+            snapshot = json.load(file)
+
+    if snapshot.get("format") != snapshot_format:
+        raise ValueError("Unsupported snapshot format: {}".format(snapshot.get("format")))
+    return snapshot
+
+def is_msgpack_path(path):
+    if not path.endswith(".msgpack"): return False
+    if msgpack is None: raise ImportError("msgpack is required to read and write .msgpack snapshots")
+    return True
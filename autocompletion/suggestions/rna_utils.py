@@ -1,3 +1,4 @@
+import re
 import textwrap
 
 def join_lines(function):
@@ -5,6 +6,35 @@ def join_lines(function):
         return "\n".join(list(function(*args, **kwargs)))
     return wrapper
 
+
+# RNA does not change while the same addons are registered,
+# so the introspection results are cached until clear_rna_cache is called
+rna_cache = {}
+
+def clear_rna_cache():
+    rna_cache.clear()
+
+# cached by the idname of the operator
+def cache_by_operator(function):
+    def wrapper(operator, *args):
+        key = (function.__name__, operator.idname_py()) + args
+        if key not in rna_cache:
+            rna_cache[key] = function(operator, *args)
+        return rna_cache[key]
+    return wrapper
+
+# cached by the address of the RNA property,
+# properties without one (e.g. the fake ones used for the bpy generation) are not cached
+def cache_by_property(function):
+    def wrapper(property, *args):
+        as_pointer = getattr(property, "as_pointer", None)
+        if not callable(as_pointer): return function(property, *args)
+        key = (function.__name__, as_pointer()) + args
+        if key not in rna_cache:
+            rna_cache[key] = function(property, *args)
+        return rna_cache[key]
+    return wrapper
+
 def indent(lines, indentation = 4):
     prefix = " " * indentation
     if isinstance(lines, str): lines = lines.split("\n")
@@ -36,24 +66,36 @@ def make_property_description(property, width = 70):
     else:
         yield "{} {}".format(identifier, description)
 
+@cache_by_operator
 def get_operator_parameters(operator):
     rna = operator.get_rna().bl_rna
     return [prop for prop in rna.properties if prop.identifier != "rna_type"]
 
-def get_enum_items_string(property, width = 70):
-    items = get_enum_items(property)
+# matches 'parameter = "' for all enum parameters of the operator,
+# the group 'identifier' contains the parameter name
+@cache_by_operator
+def get_enum_parameter_pattern(operator):
+    identifiers = [re.escape(parameter.identifier) for parameter in get_operator_parameters(operator)
+                   if len(get_enum_items(parameter)) > 0]
+    if len(identifiers) == 0: return None
+    return re.compile(r"\b(?P<identifier>{})\s*=\s*(\"|\')".format("|".join(identifiers)))
+
+def format_enum_items(items, width = 70):
     if len(items) == 0: return ""
     lines = textwrap.wrap(str(items), width)
     return "\n".join(lines)
 
+@cache_by_property
 def get_enum_items(property):
     return [item.identifier for item in getattr(property, "enum_items", [])]
 
+@cache_by_property
 def get_property_default(property):
     if len(getattr(property, "default_array", [])) > 0:
         return repr(property.default_array[:])
     return repr(getattr(property, "default", None))
 
+@cache_by_property
 def get_readable_property_type(property):
     suffix = "[{}]".format(property.array_length) if getattr(property, "array_length", 1) > 1 else ""
     if property.type == "BOOLEAN": return "Boolean" + suffix
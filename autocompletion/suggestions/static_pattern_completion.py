@@ -1,6 +1,8 @@
-import re
+import os
 import bpy
 from . interface import Provider, Completion
+from . fuzzy_matching import FuzzyMatcher
+from . user_patterns import UserPatterns
 
 
 class WordCompletion(Completion):
@@ -11,22 +13,25 @@ class WordCompletion(Completion):
         text_block.replace_current_word(self.name)
 
 class StaticPatternProvider(Provider):
-    def complete(self, text_block):
-        return list(iter_static_completions(text_block))
+    def iter_completions(self, text_block):
+        return iter_static_completions(text_block)
 
 def iter_static_completions(text_block):
-    for pattern, words in suggestions.items():
-        word_start = text_block.get_current_text_after_pattern(pattern)
-        if word_start is None: continue
+    pattern_matcher = user_patterns.get_matcher()
+    for words, word_start in pattern_matcher.iter_matches(text_block.text_before_cursor):
         word_start = word_start.upper()
+        word_matcher = FuzzyMatcher(word_start)
 
         secondaryCompletions = []
         for word in words:
             if word.upper().startswith(word_start):
                 yield WordCompletion(word)
-            elif word_start in word.upper():
-                secondaryCompletions.append(WordCompletion(word))
-        yield from secondaryCompletions
+            else:
+                score = word_matcher.score(word)
+                if score is not None: secondaryCompletions.append((-score, word))
+        secondaryCompletions.sort()
+        for score, word in secondaryCompletions:
+            yield WordCompletion(word)
 
 space_properties = bpy.types.Space.bl_rna.properties
 space_types = sorted([item.identifier for item in space_properties["type"].enum_items])
@@ -52,3 +57,6 @@ suggestions = {
     "keymap_items\.new\(.*, type = (\"|\')" : event_types,
     "keymap_items\.new\(.*, value = (\"|\')" : event_values
 }
+
+user_patterns_directory = os.path.join(bpy.utils.user_resource("CONFIG"), "code_autocomplete", "patterns")
+user_patterns = UserPatterns(user_patterns_directory, suggestions.items())
@@ -0,0 +1,104 @@
+import os
+import re
+import json
+import time
+import threading
+from . pattern_matcher import PatternMatcher
+
+# This module must not depend on bpy.
+
+try: import tomllib
+except ImportError: tomllib = None
+
+update_interval = 2
+
+# Static patterns of the user, every file in the directory maps patterns to words:
+#     {"my_prop\\s*=\\s*(\"|\')" : ["FIRST", "SECOND"]}
+# Files are reloaded when they change, the patterns are served together
+# with the built-in ones by a single PatternMatcher.
+class UserPatterns:
+    def __init__(self, directory, builtin_entries):
+        self.directory = directory
+        self.builtin_entries = list(builtin_entries)
+        self.files = {}
+        self.matcher = PatternMatcher(self.builtin_entries)
+        self.last_update = 0
+        self.lock = threading.Lock()
+
+    def get_matcher(self):
+        self.update()
+        return self.matcher
+
+    def update(self):
+        with self.lock:
+            if time.time() - self.last_update < update_interval: return
+            self.last_update = time.time()
+
+            paths = set(iter_pattern_files(self.directory))
+            changed = False
+            for path in list(self.files.keys()):
+                if path not in paths:
+                    del self.files[path]
+                    changed = True
+            for path in paths:
+                changed |= self.update_file(path)
+
+            if changed:
+                entries = list(self.builtin_entries)
+                for path in sorted(self.files.keys()):
+                    entries.extend(self.files[path][1])
+                try: self.matcher = PatternMatcher(entries)
+                except re.error as e: print("Could not combine the user patterns: {}".format(e))
+
+    def update_file(self, path):
+        try: modification_time = os.path.getmtime(path)
+        except OSError: return False
+        old = self.files.get(path)
+        if old is not None and old[0] == modification_time: return False
+        self.files[path] = (modification_time, load_pattern_file(path))
+        return True
+
+def iter_pattern_files(directory):
+    if directory is None or not os.path.isdir(directory): return
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json") or (name.endswith(".toml") and tomllib is not None):
+            yield os.path.join(directory, name)
+
+def load_pattern_file(path):
+    try:
+        if path.endswith(".toml"):
+            with open(path, "rb") as file:
+                data = tomllib.load(file)
+        else:
+            with open(path, encoding = "utf-8") as file:
+                data = json.load(file)
+    except Exception as e:
+        print("Could not load patterns from {}: {}".format(path, e))
+        return []
+
+    if not isinstance(data, dict):
+        print("Patterns in {} must be a mapping from patterns to words".format(path))
+        return []
+
+    entries = []
+    for pattern, words in data.items():
+        error = get_pattern_error(pattern)
+        if error is not None:
+            print("Invalid pattern {!r} in {}: {}".format(pattern, path, error))
+            continue
+        if not isinstance(words, list) or not all(isinstance(word, str) for word in words):
+            print("The words of pattern {!r} in {} must be a list of strings".format(pattern, path))
+            continue
+        entries.append((pattern, words))
+    return entries
+
+# an unescaped backslash followed by a digit, a reference by name or a conditional group
+backreference_pattern = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?P=|\(\?\(")
+
+# patterns are combined into one regular expression, so their groups must not depend on their position
+def get_pattern_error(pattern):
+    try: regex = re.compile(pattern)
+    except re.error as e: return str(e)
+    if len(regex.groupindex) > 0: return "named groups are not supported"
+    if backreference_pattern.search(pattern): return "backreferences are not supported"
+    return None
@@ -1,5 +1,8 @@
 import re
 from . interface import Provider, Completion
+from . word_index import get_word_index
+from . fuzzy_matching import FuzzyMatcher
+from . project_words import project_words
 
 
 class WordCompletion(Completion):
@@ -11,20 +14,43 @@ class WordCompletion(Completion):
 
 
 class WordCompletionProvider(Provider):
-    def complete(self, text_block):
-        words = text_block.get_existing_words()
+    def __init__(self):
+        self.use_project_words = False
+
+    def iter_completions(self, text_block):
         current_word = text_block.current_word
-        if current_word in words: words.remove(current_word)
-        words = sort_words(words, current_word)
-        return [WordCompletion(word) for word in words]
-
-def sort_words(words, current_word):
-    current_word = current_word.lower()
-    best_matches, other_matches = [], []
-    words.sort(key = str.lower)
-    for word in words:
-        if word.lower().startswith(current_word):
-            best_matches.append(word)
-        elif current_word in word.lower():
-            other_matches.append(word)
-    return best_matches + other_matches
+        index = get_word_index(text_block.name)
+        with index.lock:
+            index.update(text_block.get_all_lines())
+
+        # words of the current text come first, then other texts, then other files
+        index_groups = [[index]]
+        if self.use_project_words:
+            index_groups.extend(project_words.get_indices(text_block.name))
+
+        best_matches, other_matches, fuzzy_matches = [], [], []
+        for indices in index_groups:
+            best, other, fuzzy = find_words(indices, current_word)
+            best_matches.extend(best)
+            other_matches.extend(other)
+            fuzzy_matches.extend(fuzzy)
+
+        used_words = {current_word}
+        for word in best_matches + other_matches + fuzzy_matches:
+            if word not in used_words:
+                used_words.add(word)
+                yield WordCompletion(word)
+
+def find_words(indices, current_word):
+    best_matches, other_matches, fuzzy_matches = [], [], []
+    for index in indices:
+        with index.lock:
+            best_matches.extend(index.lookup.iter_prefix_matches(current_word))
+            other_matches.extend(index.lookup.get_substring_matches(current_word))
+            fuzzy_matches.extend(index.lookup.get_fuzzy_matches(current_word))
+    if len(indices) > 1:
+        best_matches.sort(key = str.lower)
+        other_matches.sort(key = str.lower)
+        matcher = FuzzyMatcher(current_word)
+        fuzzy_matches.sort(key = lambda word: -matcher.score(word))
+    return best_matches, other_matches, fuzzy_matches
@@ -0,0 +1,51 @@
+import re
+import threading
+from collections import Counter
+from . line_cache import LineCache
+from . word_lookup import WordLookup
+
+# word -> number of occurrences, only changed lines get split again
+class WordIndex(LineCache):
+    def __init__(self):
+        super().__init__()
+        self.counts = Counter()
+        self.lookup = WordLookup()
+        self.lock = threading.Lock()
+
+    def calculate_value(self, line):
+        return tuple(get_words_in_line(line))
+
+    def values_changed(self, start, old_values, new_values):
+        for words in old_values:
+            for word in words:
+                self.counts[word] -= 1
+                if self.counts[word] == 0:
+                    del self.counts[word]
+                    self.lookup.remove(word)
+        for words in new_values:
+            for word in words:
+                if word not in self.counts: self.lookup.add(word)
+                self.counts[word] += 1
+
+    @property
+    def words(self):
+        return list(self.counts.keys())
+
+def get_words_in_line(line):
+    for part in re.sub("[^\w]", " ", line).split():
+        if not part.isdigit(): yield part
+
+word_indices = {}
+word_indices_lock = threading.Lock()
+
+def get_word_index(name):
+    with word_indices_lock:
+        if name not in word_indices:
+            word_indices[name] = WordIndex()
+        return word_indices[name]
+
+def remove_closed_word_indices(existing_names):
+    with word_indices_lock:
+        for name in list(word_indices.keys()):
+            if name not in existing_names:
+                del word_indices[name]
@@ -0,0 +1,82 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from . fuzzy_matching import FuzzyMatcher, get_character_mask
+
+max_gram_length = 3
+
+# Case insensitive word set that finds words starting with or containing a
+# text without looking at every word. Prefix matches use a sorted array,
+# substring matches an index of all character n-grams up to length 3.
+# Fuzzy matches only check the words whose character mask fits the query.
+class WordLookup:
+    def __init__(self):
+        self.sorted_words = []
+        self.grams = defaultdict(set)
+        self.masks = {}
+
+    def add(self, word):
+        lower_word = word.lower()
+        insort(self.sorted_words, (lower_word, word))
+        self.masks[word] = get_character_mask(word)
+        for gram in iter_grams(lower_word):
+            self.grams[gram].add(word)
+
+    def remove(self, word):
+        lower_word = word.lower()
+        index = bisect_left(self.sorted_words, (lower_word, word))
+        if index < len(self.sorted_words) and self.sorted_words[index][1] == word:
+            del self.sorted_words[index]
+        self.masks.pop(word, None)
+        for gram in iter_grams(lower_word):
+            words = self.grams.get(gram)
+            if words is None: continue
+            words.discard(word)
+            if len(words) == 0: del self.grams[gram]
+
+    def __len__(self):
+        return len(self.sorted_words)
+
+    # sorted case insensitive
+    def iter_prefix_matches(self, prefix):
+        prefix = prefix.lower()
+        index = bisect_left(self.sorted_words, (prefix, ""))
+        while index < len(self.sorted_words):
+            lower_word, word = self.sorted_words[index]
+            if not lower_word.startswith(prefix): break
+            yield word
+            index += 1
+
+    # words that contain the text but don't start with it, sorted case insensitive
+    def get_substring_matches(self, text):
+        text = text.lower()
+        if text == "": return []
+        if len(text) <= max_gram_length:
+            candidates = self.grams.get(text, ())
+        else:
+            gram_sets = sorted((self.grams.get(gram, set()) for gram in set(iter_grams_with_length(text, max_gram_length))), key = len)
+            candidates = set.intersection(*gram_sets)
+        matches = [word for word in candidates if text in word.lower() and not word.lower().startswith(text)]
+        matches.sort(key = lambda word: (word.lower(), word))
+        return matches
+
+    # words that contain the characters of the text in order but not the text itself, best first
+    def get_fuzzy_matches(self, text):
+        if len(text) < 2: return []
+        matcher = FuzzyMatcher(text)
+        lower_text = text.lower()
+        matches = []
+        for word, mask in self.masks.items():
+            if matcher.mask & ~mask: continue
+            if lower_text in word.lower(): continue
+            score = matcher.score(word, mask)
+            if score is not None: matches.append((-score, word.lower(), word))
+        matches.sort()
+        return [word for _, _, word in matches]
+
+def iter_grams(word):
+    for length in range(1, max_gram_length + 1):
+        yield from set(iter_grams_with_length(word, length))
+
+def iter_grams_with_length(word, length):
+    for i in range(len(word) - length + 1):
+        yield word[i:i + length]
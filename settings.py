@@ -13,17 +13,35 @@ def prop_changed(self, context):
 class CompletionProviders (bpy.types.PropertyGroup):
     use_jedi_completion = BoolProperty(default = True, name = "Use Jedi Completion",
         update = prop_changed, description = "Use the Jedi autocompletion library for python")
+    use_jedi_server = BoolProperty(default = False, name = "Use Jedi Server",
+        update = prop_changed, description = "Run jedi in a separate Python process so that it cannot block Blender")
     use_word_completion = BoolProperty(default = True, name = "Use Word Completion",
         update = prop_changed, description = "The context box will also contain words that you already used in the file")
+    use_project_words = BoolProperty(default = True, name = "Use Words From Other Files",
+        update = prop_changed, description = "Also suggest words of the other open texts and of the files of the current addon")
     use_operator_completion = BoolProperty(default = True, name = "Use Operator Completion",
         update = prop_changed, description = "Activate the autocompletion for calling operators (bpy.ops)")
 
+    run_concurrently = BoolProperty(default = True, name = "Run Concurrently",
+        description = "Run all providers at the same time and show the results of fast providers first")
+
+    static_pattern_budget = IntProperty(default = 20, name = "Static Patterns", min = 0,
+        description = "Time in milliseconds the provider may take (0 means no limit)")
+    operator_budget = IntProperty(default = 30, name = "Operators", min = 0,
+        description = "Time in milliseconds the provider may take (0 means no limit)")
+    jedi_budget = IntProperty(default = 200, name = "Jedi", min = 0,
+        description = "Time in milliseconds the provider may take (0 means no limit)")
+    word_budget = IntProperty(default = 30, name = "Existing Words", min = 0,
+        description = "Time in milliseconds the provider may take (0 means no limit)")
+
 class ContextBoxProperties(bpy.types.PropertyGroup):
     font_size = IntProperty(default = 12, name = "Font Size", min = 10, update = prop_changed)
     line_height = IntProperty(default = 21, name = "Line Height", min = 5, update = prop_changed)
     width = IntProperty(default = 200, name = "Width", min = 10, update = prop_changed)
     padding = IntProperty(default = 4, name = "Padding", min = 0, update = prop_changed)
     lines = IntProperty(default = 8, name = "Lines", min = 1, update = prop_changed)
+    debounce_time = IntProperty(default = 150, name = "Debounce (ms)", min = 0,
+        description = "Wait this long after the last keystroke before new completions are computed")
 
 class DescriptionBoxProperties(bpy.types.PropertyGroup):
     font_size = IntProperty(default = 12, name = "Font Size", min = 10, update = prop_changed)
@@ -44,11 +62,22 @@ class AddonPreferences(bpy.types.AddonPreferences):
     def draw(self, context):
         layout = self.layout
 
-        col = layout.column()
+        row = layout.row()
+        col = row.column()
         col.label("Completion Providers:")
         col.prop(self.completion_providers, "use_jedi_completion", "Jedi")
+        col.prop(self.completion_providers, "use_jedi_server", "Jedi in Separate Process")
         col.prop(self.completion_providers, "use_word_completion", "Existing Words")
+        col.prop(self.completion_providers, "use_project_words", "Words From Other Files")
         col.prop(self.completion_providers, "use_operator_completion", "Operators")
+        col.prop(self.completion_providers, "run_concurrently")
+
+        col = row.column(align = True)
+        col.label("Time Budgets (ms):")
+        col.prop(self.completion_providers, "static_pattern_budget")
+        col.prop(self.completion_providers, "operator_budget")
+        col.prop(self.completion_providers, "jedi_budget")
+        col.prop(self.completion_providers, "word_budget")
 
         row = layout.row()
         col = row.column(align = True)
@@ -58,6 +87,7 @@ class AddonPreferences(bpy.types.AddonPreferences):
         col.prop(self.context_box, "width")
         col.prop(self.context_box, "padding")
         col.prop(self.context_box, "lines")
+        col.prop(self.context_box, "debounce_time")
 
         col = row.column(align = True)
         col.label("Description Box")
@@ -70,3 +100,15 @@ class AddonPreferences(bpy.types.AddonPreferences):
 def get_preferences():
     addon = bpy.context.user_preferences.addons.get(addon_name)
     return getattr(addon, "preferences", None)
+
+# plain copy of the preferences that can be read outside of the main thread
+class SettingsCopy:
+    def __init__(self, property_group):
+        for property in property_group.bl_rna.properties:
+            if property.identifier == "rna_type": continue
+            value = getattr(property_group, property.identifier)
+            if property.type == "POINTER": value = SettingsCopy(value)
+            setattr(self, property.identifier, value)
+
+def get_preferences_copy():
+    return SettingsCopy(get_preferences())
@@ -20,6 +20,10 @@ class TextBlock:
         if text: return TextBlock(text)
         return None
 
+    @property
+    def name(self):
+        return self.text_block.name
+
     @property
     def filepath(self):
         return self.text_block.filepath
@@ -77,6 +81,12 @@ class TextBlock:
     def current_word(self):
         return self.get_last_word(self.text_before_cursor)
 
+    # "bpy.context.sce" -> "bpy.context."
+    @property
+    def text_before_current_word(self):
+        text = self.text_before_cursor
+        return text[:len(text) - len(self.get_last_word(text))]
+
 
     @property
     def lines(self):
@@ -135,13 +145,6 @@ class TextBlock:
     def text(self):
         return self.text_block.as_string()
 
-    def get_existing_words(self):
-        existing_words = []
-        existing_parts = set(re.sub("[^\w]", " ", self.text).split())
-        for part in existing_parts:
-            if not part.isdigit(): existing_words.append(part)
-        return existing_words
-
     def insert(self, text):
         bpy.ops.text.insert(self.override, text = text)
 
@@ -340,3 +343,41 @@ class TextBlock:
                 "space_data" : self.space,
                 "region" : self.region,
                 "window" : self.window}
+
+
+# read-only copy of a text block that can be used outside of the main thread
+class TextSnapshot(TextBlock):
+    def __init__(self, text_block):
+        self.text_block = None
+        self.snapshot_name = text_block.name
+        self.line_texts = text_block.get_all_lines()
+        self.snapshot_filepath = text_block.filepath
+        self.snapshot_cursor = text_block.cursor_position
+
+    @property
+    def name(self):
+        return self.snapshot_name
+
+    @property
+    def filepath(self):
+        return self.snapshot_filepath
+
+    @property
+    def current_line(self):
+        return self.line_texts[self.current_line_index]
+
+    @property
+    def line_amount(self):
+        return len(self.line_texts)
+
+    @property
+    def text(self):
+        return "\n".join(self.line_texts)
+
+    def iter_lines(self):
+        yield from self.line_texts
+
+    def get_character_index(self, select = False):
+        return self.snapshot_cursor[1]
+    def get_line_index(self, select = False):
+        return self.snapshot_cursor[0]
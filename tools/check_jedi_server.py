@@ -0,0 +1,71 @@
+'''
+Checks jedi_server.py without Blender: starts it with the given interpreter
+and runs a ping, a full and a delta complete request and a forced resync.
+
+Usage: python tools/check_jedi_server.py [sys_path ...]
+
+The sys paths are passed to the server, they have to contain jedi.
+Exits with 1 when one of the checks fails.
+'''
+
+import os
+import sys
+import types
+import importlib
+
+source = [
+    "import os",
+    "",
+    "def function():",
+    "    return os.pa" ]
+
+suggestions_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     "autocompletion", "suggestions")
+
+# import the bpy independent modules without running the __init__ of the addon
+def import_client_module():
+    package_name = "code_autocomplete_check_jedi_server"
+    package = types.ModuleType(package_name)
+    package.__path__ = [suggestions_directory]
+    sys.modules[package_name] = package
+    return importlib.import_module(package_name + ".jedi_server_client")
+
+def complete(client, lines):
+    line_index = len(lines) - 1
+    return client.complete("check", "", lines, line_index, len(lines[line_index]))
+
+def check(description, condition):
+    print("{}: {}".format(description, "ok" if condition else "FAILED"))
+    return condition
+
+def run_checks(client):
+    results = []
+    results.append(check("ping", client.request("ping") == "pong"))
+
+    completions = complete(client, source)
+    results.append(check("complete", "path" in [c["name"] for c in completions]))
+
+    # only the last line is sent
+    changed_source = source[:-1] + ["    return os.ge"]
+    completions = complete(client, changed_source)
+    results.append(check("delta complete", "getcwd" in [c["name"] for c in completions]))
+
+    # pretend the server has other lines than it actually has
+    client.sent_lines["check"] = changed_source[:-2]
+    completions = complete(client, source)
+    results.append(check("resync", "path" in [c["name"] for c in completions]))
+    return all(results)
+
+def main():
+    client_module = import_client_module()
+    client = client_module.JediServerClient(sys.executable, sys.argv[1:], timeout = 30)
+    try: success = run_checks(client)
+    except client_module.JediServerError as e:
+        print("jedi server error: {}".format(e))
+        success = False
+    finally:
+        client.stop()
+    sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
+    main()
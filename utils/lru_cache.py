@@ -0,0 +1,28 @@
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    def __init__(self, max_size = 100):
+        self.max_size = max_size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default = None):
+        with self.lock:
+            if key not in self.items: return default
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last = False)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()